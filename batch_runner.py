@@ -0,0 +1,121 @@
+import os
+import re
+import glob
+import time
+import asyncio
+from datetime import datetime
+from pipeline import PipelineRunner
+from utils import save_json, save_text
+from tracing import get_tracer
+from ollama_client import server_parallelism
+
+BATCH_DIR = "batch"
+
+def default_workers():
+    # Match the number of requests the local Ollama server serves in parallel
+    return server_parallelism()
+
+def find_descriptions(directory, pattern="*.txt"):
+    return sorted(glob.glob(os.path.join(directory, pattern)))
+
+def project_slug(path):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return re.sub(r'[^A-Za-z0-9_-]+', '-', stem).strip('-').lower() or "project"
+
+async def _run_project(runner, description_file, output_dir, force):
+    entry = {
+        "description_file": description_file,
+        "output_dir": output_dir,
+        "status": "failed",
+        "elapsed_seconds": 0.0
+    }
+
+    started = time.perf_counter()
+    try:
+        with open(description_file, 'r', encoding='utf-8') as f:
+            description = f.read().strip()
+    except OSError as e:
+        entry["error"] = str(e)
+        return entry
+
+    if not description:
+        entry["error"] = "empty description"
+        return entry
+
+    save_text(os.path.join(output_dir, "project_description.txt"), description)
+    try:
+        report = await runner.run_pipeline(description, output_dir, force)
+    except Exception as e:
+        report = None
+        entry["error"] = str(e)
+
+    entry["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+    if report:
+        entry["status"] = "ok"
+        entry["project_name"] = report.get("project_name", "Unknown")
+        entry["total_monthly_cost"] = report["analysis"]["total_monthly_cost"]
+        entry["total_potential_savings"] = report["summary"]["total_potential_savings"]
+    return entry
+
+async def _run_all(runner, description_files, output_root, force):
+    output_dirs = []
+    seen = {}
+    for path in description_files:
+        slug = project_slug(path)
+        seen[slug] = seen.get(slug, 0) + 1
+        if seen[slug] > 1:
+            slug = f"{slug}-{seen[slug]}"
+        output_dirs.append(os.path.join(output_root, slug))
+
+    return await asyncio.gather(*(
+        _run_project(runner, path, output_dir, force)
+        for path, output_dir in zip(description_files, output_dirs)
+    ))
+
+def run_batch(directory, workers=None, output_root=BATCH_DIR, pattern="*.txt", force=False,
+              billing_generator=None, cost_analyzer=None):
+    """
+    Analyze every project description in a directory.
+
+    Each project writes its artifacts to outputs/<output_root>/<slug>/ and an
+    index with per-project status and timing is saved as batch_index.json.
+
+    Returns:
+        dict: The batch index, or None if no description files were found
+    """
+    description_files = find_descriptions(directory, pattern)
+    if not description_files:
+        print(f"No description files matching {pattern} in {directory}")
+        return None
+
+    workers = workers or default_workers()
+    print(f"Analyzing {len(description_files)} projects with {workers} workers...")
+
+    tracer = get_tracer()
+    tracer.start_trace()
+    started = time.perf_counter()
+    runner = PipelineRunner(concurrency=workers, billing_generator=billing_generator,
+                            cost_analyzer=cost_analyzer)
+    try:
+        entries = asyncio.run(_run_all(runner, description_files, output_root, force))
+    finally:
+        total_seconds = time.perf_counter() - started
+        tracer.finish_trace()
+
+    succeeded = sum(1 for entry in entries if entry["status"] == "ok")
+    index = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "workers": workers,
+        "projects_total": len(entries),
+        "projects_succeeded": succeeded,
+        "total_seconds": round(total_seconds, 3),
+        "projects": entries
+    }
+    save_json(os.path.join(output_root, "batch_index.json"), index)
+
+    print(f"\n{'='*60}")
+    print(f"Batch complete: {succeeded}/{len(entries)} succeeded in {total_seconds:.1f}s")
+    print(f"{'='*60}")
+    for entry in entries:
+        print(f"  {entry['status']:6s} {entry['elapsed_seconds']:>8.1f}s  {entry['output_dir']}")
+    return index
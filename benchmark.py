@@ -0,0 +1,268 @@
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import platform
+import statistics
+import subprocess
+from contextlib import redirect_stdout
+import utils
+from ollama_stub import OllamaStub, MALFORMED_KINDS
+
+RESULTS_FILE = "benchmark_results.json"
+
+# Data sizes: months and replicas shape the billing history, recommendations the report
+SIZES = {
+    "small": {"months": 1, "replicas": 1, "recommendations": 6},
+    "medium": {"months": 12, "replicas": 4, "recommendations": 24},
+    "large": {"months": 36, "replicas": 16, "recommendations": 96},
+}
+
+SAMPLE_DESCRIPTION = """We run an online bookstore for independent publishers. The storefront is a
+React single-page app served from S3 and CloudFront, the API is a Node.js/Express service
+on EC2 and the catalogue lives in PostgreSQL on RDS, with Redis for sessions. We have
+around 20,000 monthly users and want to stay within 40,000 INR per month on AWS Mumbai."""
+
+SAMPLE_PROFILE = {
+    "name": "Independent Bookstore",
+    "budget_inr_per_month": 40000,
+    "description": "Online bookstore for independent publishers on AWS Mumbai.",
+    "tech_stack": {"frontend": "React", "backend": "Node.js Express", "database": "PostgreSQL",
+                   "cache": "Redis", "hosting": "AWS"},
+    "non_functional_requirements": ["scalability", "monitoring", "security"]
+}
+
+RECOMMENDATION_TYPES = ("reserved_instances", "right_sizing", "open_source", "free_tier",
+                        "alternative_provider", "optimization", "cost_effective_storage")
+
+def sample_recommendations(count, services=("EC2", "RDS", "S3", "CloudFront", "ElastiCache")):
+    recommendations = []
+    for i in range(count):
+        service = services[i % len(services)]
+        current_cost = 1000.0 + 250 * (i % 7)
+        recommendations.append({
+            "title": f"Optimize {service} spend #{i + 1}",
+            "service": service,
+            "current_cost": current_cost,
+            "potential_savings": round(current_cost * (0.1 + 0.05 * (i % 5)), 2),
+            "recommendation_type": RECOMMENDATION_TYPES[i % len(RECOMMENDATION_TYPES)],
+            "description": f"Reduce the {service} bill by matching capacity to the measured usage.",
+            "implementation_effort": ("low", "medium", "high")[i % 3],
+            "risk_level": ("low", "medium", "high")[(i + 1) % 3],
+            "steps": ["Review usage metrics", "Apply the change in staging", "Roll out and monitor"],
+            "cloud_providers": ["AWS"]
+        })
+    return recommendations
+
+def canned_routes(recommendations=6):
+    """
+    Stub routes that answer each pipeline prompt with valid sample data.
+
+    The keywords match the profile, billing, enrichment and recommendation
+    description prompts; anything else is answered with `recommendations`
+    sample recommendations.
+    """
+    from procedural_billing import generate_procedural_billing
+    billing = generate_procedural_billing(SAMPLE_PROFILE)
+    return [
+        ("project profile", json.dumps(SAMPLE_PROFILE)),
+        ("billing records", json.dumps(billing)),
+        ("each cloud resource", "{}"),
+        ("recommendation number", json.dumps({str(i): f"Sample description {i}." for i in range(1, 11)})),
+        ("optimization recommendations", json.dumps(sample_recommendations(recommendations))),
+    ]
+
+def git_revision():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        return result.stdout.strip() or None
+    except OSError:
+        return None
+
+def time_stage(fn, repeat, setup=None):
+    # Stage output is discarded so console speed does not skew the timings
+    timings = []
+    result = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        with redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            result = fn()
+            timings.append(time.perf_counter() - started)
+    return timings, result
+
+def summarize_timings(timings):
+    return {
+        "runs": len(timings),
+        "min_s": round(min(timings), 6),
+        "median_s": round(statistics.median(timings), 6),
+        "mean_s": round(statistics.fmean(timings), 6)
+    }
+
+def run_benchmarks(sizes=None, repeat=3, latency=0.0, tokens_per_second=None, malformed=None,
+                   malformed_every=1, billing_mode="procedural"):
+    """
+    Time each pipeline stage against a local Ollama stub.
+
+    Args:
+        sizes: Names from SIZES to run (default: all)
+        repeat: Runs per stage and size
+        latency, tokens_per_second, malformed, malformed_every: OllamaStub settings
+        billing_mode: BillingGenerator mode
+
+    Returns:
+        dict: Environment, stub settings and one result per stage and size
+    """
+    from llm_handler import LLMHandler
+    from profile_extractor import ProfileExtractor
+    from billing_generator import BillingGenerator, CHUNK_CACHE_DIR
+    from cost_analyzer import CostAnalyzer
+    from cost_optimizer import CostOptimizer
+
+    stub_settings = {"latency": latency, "tokens_per_second": tokens_per_second,
+                     "malformed": malformed, "malformed_every": malformed_every}
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "billing_mode": billing_mode,
+        "stub": stub_settings,
+        "structured_output": malformed is None,
+        "results": []
+    }
+
+    # Artifacts and chunk caches go to a scratch directory, not the real outputs/
+    output_dir = utils.OUTPUT_DIR
+    scratch = tempfile.mkdtemp(prefix="cost-optimizer-bench-")
+    utils.OUTPUT_DIR = scratch
+    try:
+        for name in sizes or list(SIZES):
+            size = SIZES[name]
+            print(f"Benchmarking size '{name}' ({size['months']} months x {size['replicas']} replicas)...")
+            with OllamaStub(routes=canned_routes(size["recommendations"]), **stub_settings) as stub:
+                # The stub never damages schema-constrained responses, so damaged runs use plain text
+                llm = LLMHandler(base_url=stub.url, use_cache=False, structured=malformed is None)
+                extractor = ProfileExtractor()
+                generator = BillingGenerator(mode=billing_mode, months=size["months"],
+                                             replicas=size["replicas"])
+                analyzer = CostAnalyzer()
+                for stage in (extractor, generator, analyzer):
+                    stage.llm = llm
+                cli = CostOptimizer(interactive=False)
+
+                def clear_chunks():
+                    shutil.rmtree(utils.get_output_path(CHUNK_CACHE_DIR), ignore_errors=True)
+
+                stages = []
+                timings, profile = time_stage(lambda: extractor.extract_profile(SAMPLE_DESCRIPTION), repeat)
+                stages.append(("extract_profile", timings, {}))
+                profile = profile or SAMPLE_PROFILE
+
+                timings, billing = time_stage(lambda: generator.generate_billing_response(profile), repeat,
+                                              setup=clear_chunks)
+                stages.append(("generate_billing_response", timings, {"records": len(billing or ())}))
+
+                timings, report = time_stage(lambda: analyzer.create_report(profile, billing), repeat)
+                count = len(report["recommendations"]) if report else 0
+                stages.append(("create_report", timings, {"recommendations": count}))
+
+                if report:
+                    timings, text = time_stage(lambda: cli.generate_text_summary(report), repeat)
+                    stages.append(("generate_text_summary", timings, {"characters": len(text)}))
+
+                for stage, timings, extra in stages:
+                    entry = {"size": name, "stage": stage}
+                    entry.update(size)
+                    entry.update(extra)
+                    entry.update(summarize_timings(timings))
+                    results["results"].append(entry)
+                results["stub_requests"] = results.get("stub_requests", 0) + stub.requests
+    finally:
+        utils.OUTPUT_DIR = output_dir
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    return results
+
+def compare_results(baseline, current):
+    """
+    Median timing ratio of `current` to `baseline` for each stage and size.
+
+    Returns:
+        list: (size, stage, baseline median, current median, ratio) tuples
+    """
+    before = {(r["size"], r["stage"]): r["median_s"] for r in baseline.get("results", [])}
+    rows = []
+    for r in current.get("results", []):
+        key = (r["size"], r["stage"])
+        if key in before:
+            ratio = r["median_s"] / before[key] if before[key] > 0 else float('inf')
+            rows.append((r["size"], r["stage"], before[key], r["median_s"], ratio))
+    return rows
+
+def print_results(results, baseline=None):
+    print(f"\n{'='*80}")
+    print(f"  BENCHMARK RESULTS ({results['git_revision'] or 'unknown revision'})")
+    print(f"{'='*80}")
+    print(f"  {'Size':8s} {'Stage':28s} {'Median':>10s} {'Min':>10s}")
+    for r in results["results"]:
+        print(f"  {r['size']:8s} {r['stage']:28s} {r['median_s'] * 1000:>8.1f}ms {r['min_s'] * 1000:>8.1f}ms")
+
+    if baseline:
+        print(f"\n  Compared with {baseline.get('git_revision') or 'baseline'}:")
+        for size, stage, before, after, ratio in compare_results(baseline, results):
+            print(f"  {size:8s} {stage:28s} {before * 1000:>8.1f}ms -> {after * 1000:>8.1f}ms  x{ratio:.2f}")
+    print(f"{'='*80}\n")
+
+def parse_args(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Time the pipeline stages against a local Ollama stub")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), help="Data sizes to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage and size (default: 3)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Stub latency before the first token, in seconds")
+    parser.add_argument("--tokens-per-second", type=float, help="Stub generation speed (default: unlimited)")
+    parser.add_argument("--malformed", choices=MALFORMED_KINDS, help="Make the stub return damaged JSON (turns off structured output)")
+    parser.add_argument("--malformed-every", type=int, default=1, help="Damage every n-th stub response (default: 1)")
+    parser.add_argument("--billing-mode", choices=["procedural", "llm"], default="procedural")
+    parser.add_argument("--output", metavar="FILE", default=RESULTS_FILE,
+                        help=f"Results file under outputs/ (default: {RESULTS_FILE})")
+    parser.add_argument("--compare", metavar="FILE", help="Earlier results file to compare against")
+    parser.add_argument("--serve", type=int, metavar="PORT",
+                        help="Only run the stub on PORT with canned responses, e.g. 11434 for the full app")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.serve is not None:
+        stub = OllamaStub(routes=canned_routes(), latency=args.latency, tokens_per_second=args.tokens_per_second,
+                          malformed=args.malformed, malformed_every=args.malformed_every, port=args.serve)
+        stub.start()
+        print(f"Ollama stub listening on {stub.url} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            stub.stop()
+        return
+
+    baseline = None
+    if args.compare:
+        try:
+            with open(args.compare, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not read {args.compare}: {str(e)}")
+
+    results = run_benchmarks(args.sizes, max(1, args.repeat), args.latency, args.tokens_per_second,
+                             args.malformed, args.malformed_every, args.billing_mode)
+    print_results(results, baseline)
+    if not utils.save_json(args.output, results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
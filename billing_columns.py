@@ -0,0 +1,266 @@
+import os
+import json
+import struct
+import tempfile
+from array import array
+import numpy as np
+from utils import get_output_path, atomic_file
+from record_store import STRING_COLUMNS, NUMERIC_COLUMNS, StringTable, digest_columns
+
+# File layout (little-endian):
+#   magic (8 bytes) | header length (uint64) | JSON header | padding
+#   then one block per column, each starting on an ALIGNMENT boundary:
+#   uint32 codes for STRING_COLUMNS, float64 values for NUMERIC_COLUMNS.
+# The header holds the row count, the string tables, each column's offset
+# from the first block, and the size/mtime of the file it was built from.
+MAGIC = b"BILLCOL1"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+COLUMNAR_SUFFIX = ".cols"
+
+CODE_DTYPE = "<u4"
+NUMBER_DTYPE = "<f8"
+
+# Rows buffered per column before they are spooled to disk
+SPOOL_ROWS = 65536
+
+def columnar_path(path):
+    # mock_billing.json -> mock_billing.cols, cur-2025.csv.gz -> cur-2025.csv.gz.cols
+    root, ext = os.path.splitext(path)
+    return (root if ext == ".json" else path) + COLUMNAR_SUFFIX
+
+def source_stamp(path):
+    stat = os.stat(path)
+    return {"path": os.path.abspath(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+def _padding(offset):
+    return -offset % ALIGNMENT
+
+def _write_layout(f, rows, strings, blocks, source=None):
+    """
+    Write header and column blocks. `blocks` maps each column to an iterable
+    of byte chunks, so spooled columns are copied without loading them.
+    """
+    offsets = {}
+    offset = 0
+    for column in STRING_COLUMNS + NUMERIC_COLUMNS:
+        offsets[column] = offset
+        size = rows * (4 if column in STRING_COLUMNS else 8)
+        offset += size + _padding(size)
+
+    header = json.dumps({
+        "version": FORMAT_VERSION,
+        "rows": rows,
+        "source": source,
+        "strings": strings,
+        "columns": {column: {"dtype": CODE_DTYPE if column in STRING_COLUMNS else NUMBER_DTYPE,
+                             "offset": offsets[column]}
+                    for column in offsets}
+    }, ensure_ascii=False).encode('utf-8')
+    prefix = len(MAGIC) + 8 + len(header)
+    f.write(MAGIC)
+    f.write(struct.pack("<Q", len(header)))
+    f.write(header)
+    f.write(b"\0" * _padding(prefix))
+
+    for column in STRING_COLUMNS + NUMERIC_COLUMNS:
+        written = 0
+        for chunk in blocks[column]:
+            f.write(chunk)
+            written += len(chunk)
+        f.write(b"\0" * _padding(written))
+
+_ARRAY_DTYPES = {'I': np.uint32, 'd': np.float64}
+
+def _to_bytes(values, dtype):
+    # array('I'/'d') buffers in native byte order -> little-endian bytes
+    return np.frombuffer(values, dtype=_ARRAY_DTYPES[values.typecode]).astype(dtype, copy=False).tobytes()
+
+def save_columnar(filename, store, source=None):
+    """
+    Write a BillingRecordStore as a columnar file.
+
+    Args:
+        filename: Output file, relative to the output directory
+        store: BillingRecordStore
+        source: Path of the file the records came from; its size and mtime
+            are recorded so readers can tell when the columnar copy is stale
+
+    Returns:
+        bool: True if saved
+    """
+    filepath = get_output_path(filename)
+    try:
+        blocks = {column: [_to_bytes(store.codes[column], CODE_DTYPE)] for column in STRING_COLUMNS}
+        blocks.update({column: [_to_bytes(store.numbers[column], NUMBER_DTYPE)] for column in NUMERIC_COLUMNS})
+        strings = {column: store.tables[column].values for column in STRING_COLUMNS}
+        stamp = source_stamp(source) if source else None
+        with atomic_file(filepath) as f:
+            _write_layout(f, len(store), strings, blocks, stamp)
+        print(f"Saved: {filepath}")
+        return True
+    except Exception as e:
+        print(f"Error saving {filepath}: {str(e)}")
+        return False
+
+def _number(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+class ColumnarWriter:
+    """
+    Stream billing records into a columnar file.
+
+    Each column is spooled to its own temporary file in batches, so memory
+    holds the string tables and one batch, however many records there are.
+    The target is replaced only when the block exits cleanly.
+    """
+
+    def __init__(self, filename, source=None):
+        self.filepath = get_output_path(filename)
+        self.source = source
+        self.rows = 0
+        self.aborted = False
+        self.tables = {column: StringTable() for column in STRING_COLUMNS}
+        self._codes = {column: array('I') for column in STRING_COLUMNS}
+        self._numbers = {column: array('d') for column in NUMERIC_COLUMNS}
+        self._spools = {}
+
+    def __enter__(self):
+        directory = os.path.dirname(self.filepath) or "."
+        self._spools = {column: tempfile.TemporaryFile(dir=directory)
+                        for column in STRING_COLUMNS + NUMERIC_COLUMNS}
+        return self
+
+    def append(self, record):
+        for column in STRING_COLUMNS:
+            self._codes[column].append(self.tables[column].code(str(record.get(column) or "")))
+        for column in NUMERIC_COLUMNS:
+            self._numbers[column].append(_number(record.get(column)))
+        self.rows += 1
+        if self.rows % SPOOL_ROWS == 0:
+            self._spool()
+
+    def abort(self):
+        self.aborted = True
+
+    def _spool(self):
+        for column, values in self._codes.items():
+            self._spools[column].write(_to_bytes(values, CODE_DTYPE))
+            del values[:]
+        for column, values in self._numbers.items():
+            self._spools[column].write(_to_bytes(values, NUMBER_DTYPE))
+            del values[:]
+
+    def _chunks(self, column):
+        spool = self._spools[column]
+        spool.seek(0)
+        while True:
+            chunk = spool.read(1 << 20)
+            if not chunk:
+                return
+            yield chunk
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is not None or self.aborted:
+                return False
+            self._spool()
+            strings = {column: table.values for column, table in self.tables.items()}
+            blocks = {column: self._chunks(column) for column in self._spools}
+            stamp = source_stamp(self.source) if self.source else None
+            with atomic_file(self.filepath) as f:
+                _write_layout(f, self.rows, strings, blocks, stamp)
+            print(f"Saved: {self.filepath}")
+            return False
+        finally:
+            for spool in self._spools.values():
+                spool.close()
+
+class ColumnarBilling:
+    """
+    Read-only billing records backed by a memory-mapped columnar file.
+
+    Columns are numpy.memmap arrays, so opening costs one header read and
+    the OS pages data in as an analysis touches it; nothing is parsed or
+    copied. BillingTable wraps the arrays directly.
+    """
+
+    def __init__(self, filepath, header, data_offset):
+        self.filepath = filepath
+        self.rows = header["rows"]
+        self.source = header.get("source")
+        self.strings = header["strings"]
+        self.columns = {}
+        for column, spec in header["columns"].items():
+            if self.rows:
+                self.columns[column] = np.memmap(filepath, dtype=spec["dtype"], mode='r',
+                                                 offset=data_offset + spec["offset"], shape=(self.rows,))
+            else:
+                self.columns[column] = np.zeros(0, dtype=spec["dtype"])
+
+    @classmethod
+    def open(cls, filepath):
+        with open(filepath, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError("not a columnar billing file")
+            header_length = struct.unpack("<Q", f.read(8))[0]
+            header = json.loads(f.read(header_length))
+        if header.get("version") != FORMAT_VERSION:
+            raise ValueError(f"unsupported columnar format version {header.get('version')}")
+        prefix = len(MAGIC) + 8 + header_length
+        return cls(filepath, header, prefix + _padding(prefix))
+
+    def is_fresh(self, source):
+        # The file it was built from is unchanged since
+        try:
+            return self.source == source_stamp(source)
+        except OSError:
+            return False
+
+    def __len__(self):
+        return self.rows
+
+    def record(self, i):
+        record = {column: self.strings[column][self.columns[column][i]] for column in STRING_COLUMNS}
+        for column in NUMERIC_COLUMNS:
+            record[column] = float(self.columns[column][i])
+        return record
+
+    def __iter__(self):
+        for i in range(self.rows):
+            yield self.record(i)
+
+    def to_dicts(self):
+        return list(self)
+
+    def content_digest(self):
+        return digest_columns(self.strings,
+                              {column: np.ascontiguousarray(self.columns[column]) for column in STRING_COLUMNS},
+                              {column: np.ascontiguousarray(self.columns[column]) for column in NUMERIC_COLUMNS})
+
+def load_columnar(filename, source=None):
+    """
+    Open a columnar billing file.
+
+    Args:
+        filename: Columnar file, relative to the output directory
+        source: If given, the path of the file it was built from; the columnar
+            file is only returned while that file is unchanged (size and mtime)
+
+    Returns:
+        ColumnarBilling or None: None if missing, unreadable or stale
+    """
+    filepath = get_output_path(filename)
+    try:
+        columns = ColumnarBilling.open(filepath)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error reading {filepath}: {str(e)}")
+        return None
+    if source is not None and not columns.is_fresh(source):
+        return None
+    return columns
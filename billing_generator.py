@@ -1,11 +1,54 @@
-from llm_handler import LLMHandler
-from utils import load_json, save_json, validate_billing_data
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+from llm_handler import get_llm_handler
+from utils import load_json, validate_billing_data, get_output_path, atomic_file, JsonArrayWriter
+from stage_cache import compute_fingerprint, is_up_to_date, record_fingerprint
+from procedural_billing import ProceduralBillingModel, month_labels, GENERATOR_VERSION
+from record_store import BillingRecordStore
+from billing_columns import ColumnarWriter, columnar_path
+from tracing import traced
+
+BILLING_MODES = ("procedural", "llm")
+CHUNK_CACHE_DIR = ".billing_chunks"
 
 class BillingGenerator:
-    def __init__(self):
-        self.llm = LLMHandler()
+    # Bump when the billing prompt changes so cached billing data is regenerated
+    PROMPT_VERSION = 1
+
+    def __init__(self, mode="procedural", enrich=False, months=1, seed=None,
+                 replicas=1, start_month="2025-01", workers=4):
+        # "procedural" builds records from pricing tables; "llm" asks the model for them.
+        # With enrich=True the LLM only writes the per-resource descriptions.
+        # Histories longer than one month are generated as one chunk per month.
+        if mode not in BILLING_MODES:
+            raise ValueError(f"Unknown billing mode: {mode}")
+        self.llm = get_llm_handler()
+        self.mode = mode
+        self.enrich = enrich
+        self.months = max(1, months)
+        self.seed = seed
+        self.replicas = max(1, replicas)
+        self.start_month = start_month
+        self.workers = max(1, workers)
+
+    def chunk_settings(self):
+        # Everything that shapes a single month, but not the number of months
+        settings = {"mode": self.mode, "enrich": self.enrich, "start_month": self.start_month}
+        if self.mode == "procedural":
+            settings.update({"generator_version": GENERATOR_VERSION, "seed": self.seed,
+                             "replicas": self.replicas})
+        return settings
+
+    def fingerprint(self, profile):
+        settings = dict(self.chunk_settings(), months=self.months)
+        return compute_fingerprint("billing", self.PROMPT_VERSION, self.llm, profile, settings)
+
+    def chunk_dir(self, profile):
+        key = compute_fingerprint("billing-chunk", self.PROMPT_VERSION, self.llm, profile, self.chunk_settings())
+        return os.path.join(CHUNK_CACHE_DIR, key[:32])
         
-    def create_billing_prompt(self, profile):
+    def create_billing_prompt(self, profile, month="2025-01"):
         tech_stack_str = ', '.join([f"{k}: {v}" for k,v in profile.get('tech_stack',{}).items()])
         budget = profile.get('budget_inr_per_month', 'Not specified')
         
@@ -19,7 +62,7 @@ Tech Stack: {tech_stack_str}
 Generate exactly 12 billing records. Total cost should be around ₹{budget} (90-110% of budget).
 
 Each record MUST have these fields:
-- month: "2025-01"
+- month: "{month}"
 - service: service name (EC2, RDS, S3, Lambda, CloudWatch, etc.)
 - resource_id: unique ID (e.g., "i-web-01")
 - region: "ap-south-1"
@@ -31,7 +74,7 @@ Each record MUST have these fields:
 
 Example record:
 {{
-  "month": "2025-01",
+  "month": "{month}",
   "service": "EC2",
   "resource_id": "i-web-01",
   "region": "ap-south-1",
@@ -53,12 +96,149 @@ Generate the JSON array now:"""
         
         return prompt 
     
+    def create_enrichment_prompt(self, profile, records):
+        resources = {}
+        for record in records:
+            resources.setdefault(record['resource_id'], f"{record['service']} {record['usage_type']}")
+        resources_str = '\n'.join(f"- {rid}: {kind}" for rid, kind in resources.items())
+
+        prompt = f"""Write a short description (max 8 words) of what each cloud resource does in this project.
+
+Project: {profile.get('name', 'Unknown Project')}
+Summary: {profile.get('description', '')}
+
+Resources:
+{resources_str}
+
+Respond with ONLY a JSON object mapping each resource id to its description, for example:
+{{"i-app-01": "Node.js API server"}}"""
+
+        return prompt
+
+    def enrich_descriptions(self, profile, records):
+        print("Enriching billing descriptions using LLM...")
+        descriptions = self.llm.call_llm_for_json(self.create_enrichment_prompt(profile, records),
+                                                  expected_type="object")
+        if not descriptions:
+            print(" Could not enrich descriptions, keeping generated ones")
+            return records
+
+        for record in records:
+            desc = descriptions.get(record['resource_id'])
+            if isinstance(desc, str) and desc.strip():
+                record['desc'] = desc.strip()
+        return records
+
+    def generate_chunk(self, profile, month_index, model=None):
+        month = month_labels(self.start_month, month_index + 1)[-1]
+        if self.mode == "llm":
+            records = self.generate_llm_billing(profile, month=month)
+        else:
+            records = model.month_records(month_index)
+            if not validate_billing_data(records):
+                return None
+        if records and self.enrich:
+            self.enrich_descriptions(profile, records)
+        return records
+
+    def iter_history(self, profile):
+        """
+        Yield the billing records of each month, in order.
+
+        Months are produced concurrently on up to `workers` threads. Each month
+        is cached on disk, so extending a history only generates the new months.
+        """
+        model = None
+        if self.mode == "procedural":
+            model = ProceduralBillingModel(profile, self.start_month, self.replicas, self.seed)
+
+        chunk_dir = self.chunk_dir(profile)
+        labels = month_labels(self.start_month, self.months)
+        cached = sum(1 for label in labels
+                     if os.path.exists(get_output_path(os.path.join(chunk_dir, f"{label}.json"))))
+        if self.months > 1:
+            print(f" {cached} of {self.months} months cached, generating {self.months - cached}")
+
+        def produce(month_index):
+            chunk_path = get_output_path(os.path.join(chunk_dir, f"{labels[month_index]}.json"))
+            try:
+                with open(chunk_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                pass
+
+            records = self.generate_chunk(profile, month_index, model)
+            if records:
+                # Each writer gets its own temporary file, so projects sharing a chunk dir don't collide
+                with atomic_file(chunk_path) as f:
+                    f.write(json.dumps(records, ensure_ascii=False).encode('utf-8'))
+            return records
+
+        if self.months == 1:
+            yield produce(0)
+            return
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for records in pool.map(produce, range(self.months)):
+                yield records
+
+    @traced("stage.billing")
     def generate_billing_response(self, profile):
-        print("\nGenerating synthetic billing data...")
-        print("This may take 30-60 seconds...")
+        if self.mode == "procedural":
+            print("\nGenerating synthetic billing data from pricing tables...")
+        else:
+            print("\nGenerating synthetic billing data...")
+            print("This may take 30-60 seconds per month...")
+
+        # Each validated month is packed into the compact store and its dicts released
+        response = BillingRecordStore()
+        for records in self.iter_history(profile):
+            if not records:
+                print(" Failed to generate the billing data")
+                return None
+            response.extend(records)
+
+        total_cost = sum(response.numbers['cost_inr'])
+        print(f" Generated {len(response)} billing records")
+        print(f" Total cost: ₹{total_cost:,.2f}")
+
+        return response
+
+    @traced("stage.billing")
+    def generate_history(self, profile, artifact):
+        """
+        Generate the billing history and stream it to `artifact` month by month,
+        with a columnar copy next to it.
 
-        prompt = self.create_billing_prompt(profile)
-        response = self.llm.call_llm_for_json(prompt, expected_type="array")
+        Returns:
+            dict: Record count, total cost and cost per service, or None on failure
+        """
+        summary = {"records": 0, "total_cost": 0.0, "service_costs": {}}
+        # The JSON writer closes first, so the columnar copy is stamped with the final file
+        with ColumnarWriter(columnar_path(artifact), source=get_output_path(artifact)) as columns:
+            with JsonArrayWriter(artifact) as writer:
+                for records in self.iter_history(profile):
+                    if not records:
+                        print(" Failed to generate the billing data")
+                        writer.abort()
+                        columns.abort()
+                        return None
+                    for record in records:
+                        writer.write(record)
+                        columns.append(record)
+                        service = record.get('service', 'Unknown')
+                        cost = record.get('cost_inr', 0)
+                        summary["total_cost"] += cost
+                        summary["service_costs"][service] = summary["service_costs"].get(service, 0) + cost
+                    summary["records"] += len(records)
+
+        print(f" Generated {summary['records']} billing records ({self.months} month(s))")
+        print(f" Total cost: ₹{summary['total_cost']:,.2f}")
+        return summary
+
+    def generate_llm_billing(self, profile, month="2025-01"):
+        prompt = self.create_billing_prompt(profile, month)
+        response = self.llm.call_llm_for_json(prompt, expected_type="array", schema="billing")
 
         if not response:
             print(" Failed to generate the billing data")
@@ -80,37 +260,42 @@ Generate the JSON array now:"""
 
         return response
     
-    def run(self):
-        profile = load_json("project_profile.json")
+    def run(self, output_dir="", force=False):
+        profile = load_json(os.path.join(output_dir, "project_profile.json"))
         if not profile:
             print(" Could not load project_profile.json")
             return False
+
+        artifact = os.path.join(output_dir, "mock_billing.json")
+        fingerprint = self.fingerprint(profile)
+        if not force and is_up_to_date(artifact, fingerprint):
+            print(" Project profile unchanged, reusing mock_billing.json")
+            return True
         
         print(f"\n{'='*60}")
         print(f"Generating billing for: {profile.get('name','Unknown')}")
         print(f"Budget: ₹{profile.get('budget_inr_per_month', 0):,}/month")
         print(f"{'='*60}")
 
-        billing = self.generate_billing_response(profile)
-        if not billing:
+        if self.mode == "procedural":
+            print("\nGenerating synthetic billing data from pricing tables...")
+        else:
+            print("\nGenerating synthetic billing data...")
+            print("This may take 30-60 seconds per month...")
+
+        # Records are streamed to disk month by month instead of held in memory
+        summary = self.generate_history(profile, artifact)
+        if not summary:
             return False
-        
-        if save_json("mock_billing.json", billing):
-            services = {}
-            for record in billing:
-                service = record.get('service', 'Unknown')
-                cost = record.get('cost_inr', 0)
-                services[service] = services.get(service, 0) + cost
-
-            print(f"\n{'='*60}")
-            print("Cost breakdown by service:")
-            print(f"{'='*60}")
-            for service, cost in sorted(services.items(), key=lambda x: x[1], reverse=True):
-                print(f"  {service:20s} ₹{cost:>10,.2f}")
-            print(f"{'='*60}\n")
-            return True 
-        
-        return False
+
+        record_fingerprint(artifact, fingerprint)
+        print(f"\n{'='*60}")
+        print("Cost breakdown by service:")
+        print(f"{'='*60}")
+        for service, cost in sorted(summary["service_costs"].items(), key=lambda x: x[1], reverse=True):
+            print(f"  {service:20s} ₹{cost:>10,.2f}")
+        print(f"{'='*60}\n")
+        return True
     
 if __name__ == "__main__":
     generator = BillingGenerator()
@@ -0,0 +1,180 @@
+import csv
+import json
+from utils import open_compressed, split_compression
+
+# Candidate source columns for each BillingRecord field, covering our own
+# export format, AWS CUR (legacy "lineItem/..." headers) and CUR 2.0 (snake_case)
+COLUMN_ALIASES = {
+    "month": ["month", "lineItem/UsageStartDate", "line_item_usage_start_date",
+              "bill/BillingPeriodStartDate", "bill_billing_period_start_date"],
+    "service": ["service", "product/ProductName", "product_product_name",
+                "lineItem/ProductCode", "line_item_product_code"],
+    "resource_id": ["resource_id", "lineItem/ResourceId", "line_item_resource_id"],
+    "region": ["region", "product/region", "product_region", "product/regionCode", "product_region_code"],
+    "usage_type": ["usage_type", "lineItem/UsageType", "line_item_usage_type"],
+    "usage_quantity": ["usage_quantity", "lineItem/UsageAmount", "line_item_usage_amount"],
+    "unit": ["unit", "pricing/unit", "pricing_unit"],
+    "cost_inr": ["cost_inr"],
+    "cost_usd": ["lineItem/UnblendedCost", "line_item_unblended_cost"],
+    "currency": ["lineItem/CurrencyCode", "line_item_currency_code"],
+    "desc": ["desc", "lineItem/LineItemDescription", "line_item_line_item_description"],
+}
+
+USD_TO_INR = 83.0
+MAX_REPORTED_ERRORS = 20
+
+def open_billing_file(path):
+    # Transparent gzip/zstd based on the extension
+    return open_compressed(path, 'rt')
+
+def detect_format(path):
+    name = split_compression(path)[0]
+    if name.endswith('.csv'):
+        return "csv"
+    if name.endswith('.jsonl') or name.endswith('.ndjson'):
+        return "jsonl"
+    raise ValueError(f"Unsupported billing file format: {path} (expected .csv or .jsonl, optionally .gz or .zst)")
+
+def resolve_columns(columns):
+    # Map each BillingRecord field to the first matching source column
+    available = set(columns)
+    mapping = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in available:
+                mapping[field] = alias
+                break
+    return mapping
+
+def map_record(row, mapping, usd_to_inr=USD_TO_INR):
+    # row is a dict (JSONL) or a list (CSV); mapping values are keys or column indexes
+    def get(field, default=""):
+        source = mapping.get(field)
+        if source is None:
+            return default
+        if isinstance(row, dict):
+            return row.get(source, default)
+        return row[source] if source < len(row) else default
+
+    record = {}
+    for field in ("month", "service", "resource_id", "region", "usage_type", "unit", "desc"):
+        record[field] = get(field)
+    # Dates such as "2025-01-01T00:00:00Z" become "2025-01"
+    record["month"] = str(record["month"])[:7]
+    record["usage_quantity"] = get("usage_quantity", 0)
+
+    if "cost_inr" in mapping:
+        record["cost_inr"] = get("cost_inr", None)
+    elif "cost_usd" in mapping:
+        cost = _to_float(get("cost_usd", None))
+        currency = get("currency", "USD")
+        if cost is not None and currency != "INR":
+            cost *= usd_to_inr
+        record["cost_inr"] = cost
+    else:
+        record["cost_inr"] = None
+    return record
+
+def iter_billing_records(path, usd_to_inr=USD_TO_INR):
+    """
+    Stream billing records from a CSV or JSONL file, optionally gzip or zstd compressed.
+
+    Yields:
+        dict: Records with the BillingRecord field names; values are not yet validated
+    """
+    file_format = detect_format(path)
+    with open_billing_file(path) as f:
+        if file_format == "csv":
+            reader = csv.reader(f)
+            header = next(reader, [])
+            positions = {name: i for i, name in enumerate(header)}
+            mapping = {field: positions[column] for field, column in resolve_columns(header).items()}
+            for row in reader:
+                yield map_record(row, mapping, usd_to_inr)
+        else:
+            mapping = None
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    yield None
+                    continue
+                if not isinstance(row, dict):
+                    yield None
+                    continue
+                if mapping is None:
+                    mapping = resolve_columns(row.keys())
+                yield map_record(row, mapping, usd_to_inr)
+
+class BillingValidator:
+    """
+    One-pass validation and counting of streamed billing records.
+
+    Totals are computed from the columnar copy the valid records are written
+    to, so only counts and the first errors are kept here.
+    """
+
+    def __init__(self):
+        self.record_count = 0
+        self.invalid_count = 0
+        self.errors = []
+
+    def add(self, record):
+        index = self.record_count + self.invalid_count
+        error = _validate(record)
+        if error:
+            self.invalid_count += 1
+            if len(self.errors) < MAX_REPORTED_ERRORS:
+                self.errors.append(f"Record {index}: {error}")
+            return False
+
+        self.record_count += 1
+        return True
+
+def ingest_billing(path, usd_to_inr=USD_TO_INR, writer=None):
+    """
+    Validate a billing export in a single streaming pass.
+
+    With a `writer` (e.g. billing_columns.ColumnarWriter), every valid record
+    is also appended to it.
+
+    Returns:
+        BillingValidator: Validation results, or None if the file can't be read
+    """
+    validator = BillingValidator()
+    try:
+        for record in iter_billing_records(path, usd_to_inr):
+            if validator.add(record) and writer is not None:
+                writer.append(record)
+    except (OSError, ValueError, csv.Error) as e:
+        print(f"Error reading {path}: {str(e)}")
+        return None
+
+    print(f" Ingested {validator.record_count:,} billing records from {path}")
+    if validator.invalid_count:
+        print(f" Skipped {validator.invalid_count:,} invalid records")
+        for error in validator.errors[:5]:
+            print(f"   {error}")
+    return validator
+
+def _validate(record):
+    if record is None:
+        return "not a JSON object"
+    if not record.get("month"):
+        return "missing field: month"
+    if not record.get("service"):
+        return "missing field: service"
+    if _to_float(record.get("cost_inr")) is None:
+        return "missing or non-numeric cost"
+    return None
+
+def _to_float(value):
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,123 @@
+import numpy as np
+from record_store import BillingRecordStore
+from billing_columns import ColumnarBilling
+
+CATEGORICAL_COLUMNS = ("month", "service", "region", "resource_id", "usage_type", "unit")
+
+class BillingTable:
+    """
+    Columnar billing records.
+
+    String columns are dictionary-encoded: `codes[column]` is an int32 array
+    of indexes into `labels[column]`, in first-appearance order. Numeric
+    columns are float64 arrays. Aggregations are NumPy reductions over the
+    columns, so memory grows with the columns, not with per-row dicts.
+    """
+
+    def __init__(self, codes, labels, usage_quantity, cost_inr):
+        self.codes = codes
+        self.labels = labels
+        self.usage_quantity = usage_quantity
+        self.cost_inr = cost_inr
+
+    @classmethod
+    def from_records(cls, records):
+        # Accepts record dicts, typed BillingRecord objects, a BillingRecordStore
+        # or a memory-mapped ColumnarBilling file
+        if isinstance(records, BillingRecordStore):
+            return cls.from_store(records)
+        if isinstance(records, ColumnarBilling):
+            return cls.from_columns(records)
+        n = len(records)
+        if n and not isinstance(records[0], dict):
+            return cls._from_models(records)
+
+        codes = {}
+        labels = {}
+        for column in CATEGORICAL_COLUMNS:
+            index = {}
+            codes[column] = np.fromiter(
+                (index.setdefault(record.get(column, 'Unknown'), len(index)) for record in records),
+                dtype=np.int32, count=n
+            )
+            labels[column] = list(index)
+
+        usage_quantity = np.fromiter((_number(r.get('usage_quantity', 0)) for r in records),
+                                     dtype=np.float64, count=n)
+        cost_inr = np.fromiter((_number(r.get('cost_inr', 0)) for r in records),
+                               dtype=np.float64, count=n)
+        return cls(codes, labels, usage_quantity, cost_inr)
+
+    @classmethod
+    def _from_models(cls, records):
+        # Validated records already have float fields, so no per-value coercion
+        n = len(records)
+        codes = {}
+        labels = {}
+        for column in CATEGORICAL_COLUMNS:
+            index = {}
+            codes[column] = np.fromiter(
+                (index.setdefault(getattr(record, column), len(index)) for record in records),
+                dtype=np.int32, count=n
+            )
+            labels[column] = list(index)
+
+        usage_quantity = np.fromiter((r.usage_quantity for r in records), dtype=np.float64, count=n)
+        cost_inr = np.fromiter((r.cost_inr for r in records), dtype=np.float64, count=n)
+        return cls(codes, labels, usage_quantity, cost_inr)
+
+    @classmethod
+    def from_store(cls, store):
+        # The store is already dictionary-encoded, so its arrays convert without a per-row pass
+        codes = {column: np.frombuffer(store.codes[column], dtype=np.uint32).astype(np.int32)
+                 for column in CATEGORICAL_COLUMNS}
+        labels = {column: list(store.tables[column].values) for column in CATEGORICAL_COLUMNS}
+        usage_quantity = np.frombuffer(store.numbers['usage_quantity'], dtype=np.float64).copy()
+        cost_inr = np.frombuffer(store.numbers['cost_inr'], dtype=np.float64).copy()
+        return cls(codes, labels, usage_quantity, cost_inr)
+
+    @classmethod
+    def from_columns(cls, columns):
+        # Wraps the mapped uint32/float64 arrays as they are, without copying
+        codes = {column: columns.columns[column] for column in CATEGORICAL_COLUMNS}
+        labels = {column: columns.strings[column] for column in CATEGORICAL_COLUMNS}
+        return cls(codes, labels, columns.columns['usage_quantity'], columns.columns['cost_inr'])
+
+    def __len__(self):
+        return len(self.cost_inr)
+
+    def total_cost(self):
+        return float(self.cost_inr.sum())
+
+    def group_sums(self, column, values=None):
+        # Returns an array aligned with self.labels[column]
+        weights = self.cost_inr if values is None else values
+        return np.bincount(self.codes[column], weights=weights, minlength=len(self.labels[column]))
+
+    def group_sum(self, column, values=None):
+        sums = self.group_sums(column, values)
+        return {label: float(total) for label, total in zip(self.labels[column], sums)}
+
+    def pivot(self, rows, columns, values=None):
+        """
+        Sum `values` (default: cost) into a len(labels[rows]) x len(labels[columns])
+        matrix in one bincount over the combined codes.
+        """
+        weights = self.cost_inr if values is None else values
+        n_rows, n_columns = len(self.labels[rows]), len(self.labels[columns])
+        combined = self.codes[rows].astype(np.int64) * n_columns + self.codes[columns]
+        sums = np.bincount(combined, weights=weights, minlength=n_rows * n_columns)
+        return sums.reshape(n_rows, n_columns)
+
+    def top_k(self, column, k):
+        # Stable ordering keeps ties in first-appearance order
+        sums = self.group_sums(column)
+        order = np.argsort(-sums, kind='stable')[:k]
+        labels = self.labels[column]
+        return [(labels[i], float(sums[i])) for i in order]
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
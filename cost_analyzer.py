@@ -1,27 +1,182 @@
-from llm_handler import LLMHandler
-from utils import load_json, save_json, validate_cost_report, format_currency
-import json
+import os
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from llm_handler import get_llm_handler
+from ollama_client import server_parallelism
+from utils import load_json, load_bytes, save_json, validate_cost_report, format_currency, get_output_path
+from billing_table import BillingTable
+from record_store import BillingRecordStore
+from billing_columns import ColumnarWriter, columnar_path, load_columnar, save_columnar
+from models import validate_billing_json
+from billing_ingest import ingest_billing
+from stage_cache import compute_fingerprint, is_up_to_date, record_fingerprint
+from tracing import traced, current_span
+from prompts import PromptBuilder, compact_json
+from cost_trends import analyze_trends
+from savings_rules import run_rules, RULES_VERSION
+from savings_aggregator import select_savings
+
+DEFAULT_PROMPT_TOKEN_BUDGET = 1200
+
+# Static part of the recommendations prompt. It comes first and never changes,
+# so Ollama can reuse the evaluated prefix from one request to the next.
+RECOMMENDATIONS_PREFIX = """You are a cloud cost optimization expert. Generate actionable, diverse cost optimization recommendations for the project below.
+
+Cover where relevant: AWS/Azure/GCP alternatives, open-source options, reserved instances, right-sizing, free tiers.
+
+Respond with ONLY a JSON array, no markdown or explanations. Each element has exactly these fields:
+title (string), service (string), current_cost (INR number), potential_savings (INR number),
+recommendation_type ("alternative_provider"|"open_source"|"free_tier"|"right_sizing"|"reserved_instances"|"optimization"|"cost_effective_storage"),
+description (string), implementation_effort ("low"|"medium"|"high"), risk_level ("low"|"medium"|"high"),
+steps (array of strings), cloud_providers (array of strings, e.g. ["AWS","GCP"] or ["Open Source"])
+
+Example element:
+{"title":"Switch to Reserved Instances for EC2","service":"EC2","current_cost":5000,"potential_savings":1500,"recommendation_type":"reserved_instances","description":"Reserved instances are cheaper for steady workloads","implementation_effort":"low","risk_level":"low","steps":["Analyze EC2 usage","Buy 1-year reserved instances","Monitor savings"],"cloud_providers":["AWS"]}"""
+
+# Services that get their own request in per-service mode
+DEFAULT_MAX_SERVICES = 4
+
+RECOMMENDATION_MODES = ("llm", "rules")
+
+# Rule-based recommendations keep their numbers; the model only rewrites the descriptions
+DESCRIPTIONS_PREFIX = """You are a cloud cost optimization expert. Write the description of each cost optimization recommendation below for the project's team: 2-3 sentences on what to change and why it saves money. Keep every number as given.
+
+Respond with ONLY a JSON object mapping each recommendation number to its description, for example:
+{"1":"The application servers run around the clock, so..."}"""
+
+def _other_services_line(dropped):
+    return f"- {len(dropped)} smaller services (omitted)"
+
+def _month_suffix(analysis):
+    # Multi-month reports show the latest month's cost
+    return f" ({analysis['cost_month']})" if 'cost_month' in analysis else ""
+
+def _trend_line(trends):
+    forecast = trends['forecast']
+    status = "over" if forecast['is_over_budget'] else "under"
+    line = (f"Trend over {len(trends['months'])} months: forecast for {forecast['month']} "
+            f"is ₹{forecast['cost']:,.2f} ({status} budget)")
+    anomalies = trends.get('anomalies')
+    if anomalies:
+        line += f". Cost spikes: {', '.join(sorted({a['resource_id'] for a in anomalies[:3]}))}"
+    return line
+
+def merge_recommendations(groups):
+    """
+    Merge recommendation lists into one list, best first.
+
+    Recommendations with the same title and type are duplicates; the one
+    with the larger potential_savings is kept. The result is ordered by
+    potential_savings, highest first.
+    """
+    merged = {}
+    for group in groups:
+        for rec in group or []:
+            if not isinstance(rec, dict):
+                continue
+            key = (" ".join(str(rec.get('title', '')).lower().split()), rec.get('recommendation_type'))
+            kept = merged.get(key)
+            if kept is None or _savings(rec) > _savings(kept):
+                merged[key] = rec
+    return sorted(merged.values(), key=_savings, reverse=True)
+
+def _savings(rec):
+    try:
+        return float(rec.get('potential_savings', 0) or 0)
+    except (TypeError, ValueError):
+        return 0.0
 
 class CostAnalyzer:
-    def __init__(self):
-        self.llm = LLMHandler()
+    # Bump when the recommendations prompt changes so cached reports are regenerated
+    PROMPT_VERSION = 5
+
+    def __init__(self, prompt_token_budget=DEFAULT_PROMPT_TOKEN_BUDGET, per_service=False,
+                 max_services=DEFAULT_MAX_SERVICES, workers=None, mode="llm", describe=False,
+                 effort_budget=None):
+        # per_service=True asks for recommendations one service at a time, in parallel.
+        # mode="rules" computes recommendations from the billing records (savings_rules.py);
+        # with describe=True the LLM only writes their descriptions.
+        # effort_budget caps the effort points of the recommendations counted in the savings total.
+        if mode not in RECOMMENDATION_MODES:
+            raise ValueError(f"Unknown recommendation mode: {mode}")
+        self.llm = get_llm_handler()
+        self.mode = mode
+        self.describe = describe
+        self.effort_budget = effort_budget
+        self.prompt_token_budget = prompt_token_budget
+        self.per_service = per_service
+        self.max_services = max(1, max_services)
+        self.workers = workers
+
+    @property
+    def min_recommendations(self):
+        # The LLM is asked for 6-10 in one request. Per-service requests ask for 2-3 each
+        # from however many services are billed, minus duplicates and failed requests,
+        # and the rules return however many apply
+        return 6 if self.mode == "llm" and not self.per_service else 1
+
+    def fingerprint(self, profile, billing):
+        settings = {"per_service": self.per_service, "max_services": self.max_services, "mode": self.mode,
+                    "effort_budget": self.effort_budget}
+        if self.mode == "rules":
+            settings.update({"rules_version": RULES_VERSION, "describe": self.describe})
+        return compute_fingerprint("analysis", self.PROMPT_VERSION, self.llm, profile, billing, settings)
     
     def analyze_costs(self, profile, billing):
-        total_cost = sum(record.get('cost_inr', 0) for record in billing)
+        # billing may be a record list, a BillingRecordStore or an already columnar BillingTable
+        table = billing if isinstance(billing, BillingTable) else BillingTable.from_records(billing)
+
+        if len(table.labels['month']) > 1:
+            # A multi-month history is compared with the monthly budget through its latest
+            # month, taken from the trend's month totals so cost and forecast share one scale
+            trends = analyze_trends(table, profile.get('budget_inr_per_month', 0))
+            latest = {service: costs['latest'] for service, costs in trends['services'].items()
+                      if costs['latest'] > 0}
+            high_cost_services = dict(sorted(latest.items(), key=lambda x: x[1], reverse=True)[:3])
+            analysis = self.summarize_costs(profile, trends['monthly_totals'][-1], latest, high_cost_services)
+            analysis["cost_month"] = trends['months'][-1]
+            analysis["trends"] = trends
+            return analysis
+
+        # Group by service and find high-cost services
+        return self.summarize_costs(profile, table.total_cost(), table.group_sum('service'),
+                                    dict(table.top_k('service', 3)))
+
+    def load_billing_file(self, path, output_dir=""):
+        """
+        Billing records of a CSV/JSONL(.gz/.zst) export as a memory-mapped columnar file.
+
+        The first run streams the export once, validating each record, into
+        `<export name>.cols` in the output directory; later runs map that file
+        directly for as long as the export is unchanged.
+
+        Returns:
+            ColumnarBilling or None if the export has no valid records
+        """
+        cache = os.path.join(output_dir, columnar_path(os.path.basename(path)))
+        billing = load_columnar(cache, source=path)
+        if billing is not None:
+            print(f" Export unchanged, mapping {len(billing):,} records from {get_output_path(cache)}")
+            return billing
+
+        with ColumnarWriter(cache, source=path) as writer:
+            validator = ingest_billing(path, writer=writer)
+            if validator is None or validator.record_count == 0:
+                writer.abort()
+                return None
+        return load_columnar(cache)
+
+    def analyze_billing_file(self, profile, path, output_dir=""):
+        billing = self.load_billing_file(path, output_dir)
+        if billing is None:
+            return None
+        return self.analyze_costs(profile, billing)
+
+    def summarize_costs(self, profile, total_cost, service_costs, high_cost_services):
         budget = profile.get('budget_inr_per_month', 0)
         variance = total_cost - budget
-        
-        # Group by service
-        service_costs = {}
-        for record in billing:
-            service = record.get('service', 'Unknown')
-            cost = record.get('cost_inr', 0)
-            service_costs[service] = service_costs.get(service, 0) + cost
-        
-        # Find high-cost services
-        sorted_services = sorted(service_costs.items(), key=lambda x: x[1], reverse=True)
-        high_cost_services = dict(sorted_services[:3])
-        
+
         return {
             "total_monthly_cost": round(total_cost, 2),
             "budget": budget,
@@ -31,61 +186,40 @@ class CostAnalyzer:
             "is_over_budget": total_cost > budget
         }
     
+    def build_recommendations_prompt(self, profile, billing, analysis):
+        """
+        Returns:
+            tuple: (prompt text, estimated token count)
+        """
+        builder = PromptBuilder(RECOMMENDATIONS_PREFIX, budget=self.prompt_token_budget)
+        status = "OVER" if analysis['is_over_budget'] else "UNDER"
+        builder.add(f"Project: {profile.get('name', 'Unknown')}\n"
+                    f"Budget: ₹{analysis['budget']:,}/month. Current cost{_month_suffix(analysis)}: ₹{analysis['total_monthly_cost']:,}/month. "
+                    f"Variance: ₹{analysis['budget_variance']:,} ({status} budget)")
+
+        # Largest services first, so the budget trims the cheapest ones
+        service_costs = sorted(analysis['service_costs'].items(), key=lambda x: x[1], reverse=True)
+        builder.add_lines("Service costs (INR/month):",
+                          [f"- {service}: {cost:,.2f}" for service, cost in service_costs],
+                          keep=3, overflow=_other_services_line)
+        if 'trends' in analysis:
+            builder.add(_trend_line(analysis['trends']), optional=True)
+        builder.add(f"Tech stack: {compact_json(profile.get('tech_stack', {}))}", optional=True)
+        builder.add("Respond with ONLY the JSON array of 6-10 recommendations:")
+        return builder.build()
+
+    def build_service_prompt(self, profile, analysis, service, cost):
+        # Same static prefix as the full prompt, so all requests share the cached prefix
+        builder = PromptBuilder(RECOMMENDATIONS_PREFIX, budget=self.prompt_token_budget)
+        builder.add(f"Project: {profile.get('name', 'Unknown')}\n"
+                    f"Budget: ₹{analysis['budget']:,}/month. Current cost{_month_suffix(analysis)}: ₹{analysis['total_monthly_cost']:,}/month.")
+        builder.add(f"Service to optimize: {service}, costing ₹{cost:,.2f}/month")
+        builder.add(f"Tech stack: {compact_json(profile.get('tech_stack', {}))}", optional=True)
+        builder.add(f"Respond with ONLY a JSON array of 2-3 recommendations for {service}:")
+        return builder.build()
+
     def create_recommendations_prompt(self, profile, billing, analysis):
-        
-        service_costs_str = '\n'.join([f"  - {service}: ₹{cost:,.2f}" for service, cost in analysis['service_costs'].items()])
-        
-        prompt = f"""You are a cloud cost optimization expert. Generate actionable cost optimization recommendations.
-
-Project: {profile.get('name', 'Unknown')}
-Budget: ₹{analysis['budget']:,} per month
-Current Cost: ₹{analysis['total_monthly_cost']:,} per month
-Budget Variance: ₹{analysis['budget_variance']:,} ({"OVER" if analysis['is_over_budget'] else "UNDER"} budget)
-
-Service Costs:
-{service_costs_str}
-
-Tech Stack: {json.dumps(profile.get('tech_stack', {}), indent=2)}
-
-Your task: Generate 6-10 actionable cost optimization recommendations.
-
-CRITICAL RULES:
-1. Respond with ONLY a valid JSON array of recommendations
-2. No explanations, no markdown, no code blocks
-3. Include recommendations for: AWS, Azure, GCP alternatives, open-source options, reserved instances, right-sizing, free tiers
-4. Each recommendation must have these exact fields:
-   - title: Short descriptive title (string)
-   - service: Service being optimized (string)
-   - current_cost: Current cost in INR (number)
-   - potential_savings: Estimated savings in INR (number)
-   - recommendation_type: One of: "alternative_provider", "open_source", "free_tier", "right_sizing", "reserved_instances", "optimization", "cost_effective_storage"
-   - description: Detailed explanation (string)
-   - implementation_effort: "low", "medium", or "high"
-   - risk_level: "low", "medium", or "high"
-   - steps: Array of implementation steps (array of strings)
-   - cloud_providers: Array of applicable providers like ["AWS", "Azure", "GCP"] or ["Open Source"] (array of strings)
-
-Example recommendation:
-{{
-  "title": "Switch to Reserved Instances for EC2",
-  "service": "EC2",
-  "current_cost": 5000,
-  "potential_savings": 1500,
-  "recommendation_type": "reserved_instances",
-  "description": "Reserved instances offer significant savings for predictable workloads",
-  "implementation_effort": "low",
-  "risk_level": "low",
-  "steps": [
-    "Analyze EC2 usage patterns",
-    "Purchase 1-year reserved instances",
-    "Monitor savings"
-  ],
-  "cloud_providers": ["AWS", "Azure", "GCP"]
-}}
-
-Generate 6-10 diverse recommendations now. Respond with ONLY the JSON array:"""
-        
-        return prompt
+        return self.build_recommendations_prompt(profile, billing, analysis)[0]
     
     def generate_recommendations(self, profile, billing, analysis):
         """
@@ -93,16 +227,25 @@ Generate 6-10 diverse recommendations now. Respond with ONLY the JSON array:"""
         
         Args:
             profile: Project profile dict
-            billing: Billing records list
+            billing: Billing records (list or BillingRecordStore)
             analysis: Cost analysis dict
             
         Returns:
             list: Recommendations or None
         """
+        if self.mode == "rules":
+            if billing is not None:
+                return self.generate_rule_recommendations(profile, billing)
+            print(" Rule-based recommendations need billing records, asking the LLM instead")
+        if self.per_service:
+            return self.generate_service_recommendations(profile, analysis)
+
         print("Generating cost optimization recommendations using LLM...")
         
-        prompt = self.create_recommendations_prompt(profile, billing, analysis)
-        recommendations = self.llm.call_llm_for_json(prompt, expected_type="array")
+        prompt, tokens = self.build_recommendations_prompt(profile, billing, analysis)
+        print(f" Recommendations prompt: ~{tokens} tokens (budget {self.prompt_token_budget})")
+        recommendations = self.llm.call_llm_for_json(prompt, expected_type="array",
+                                                   schema="recommendations", json_reminder=False)
         
         if not recommendations:
             print(" Failed to generate recommendations")
@@ -111,14 +254,111 @@ Generate 6-10 diverse recommendations now. Respond with ONLY the JSON array:"""
         print(f" Generated {len(recommendations)} recommendations")
         return recommendations
     
-    def create_report(self, profile, billing):
-        analysis = self.analyze_costs(profile, billing)
+    def generate_rule_recommendations(self, profile, billing):
+        print("Computing cost optimization recommendations from billing rules...")
+        recommendations = run_rules(billing)
+        if not recommendations:
+            print(" No rule matched the billing records")
+            return None
+
+        print(f" Computed {len(recommendations)} recommendations")
+        if self.describe:
+            self.describe_recommendations(profile, recommendations)
+        return recommendations
+
+    def build_descriptions_prompt(self, profile, recommendations):
+        builder = PromptBuilder(DESCRIPTIONS_PREFIX, budget=self.prompt_token_budget)
+        builder.add(f"Project: {profile.get('name', 'Unknown')}")
+        builder.add(f"Tech stack: {compact_json(profile.get('tech_stack', {}))}", optional=True)
+        builder.add("\n".join(
+            f"{i}. {rec['title']} ({rec['service']}, saves ₹{rec['potential_savings']:,.2f}/month): {rec['description']}"
+            for i, rec in enumerate(recommendations, 1)
+        ))
+        return builder.build()
+
+    def describe_recommendations(self, profile, recommendations):
+        print("Writing recommendation descriptions using LLM...")
+        prompt, _ = self.build_descriptions_prompt(profile, recommendations)
+        descriptions = self.llm.call_llm_for_json(prompt, expected_type="object", json_reminder=False)
+        if not descriptions:
+            print(" Could not write descriptions, keeping generated ones")
+            return recommendations
+
+        for i, rec in enumerate(recommendations, 1):
+            desc = descriptions.get(str(i))
+            if isinstance(desc, str) and desc.strip():
+                rec['description'] = desc.strip()
+        return recommendations
+
+    def generate_service_recommendations(self, profile, analysis):
+        """
+        Ask for recommendations for each of the costliest services concurrently
+        and merge the answers.
+
+        Each request is small, so the first answers arrive long before a single
+        6-10 item generation would finish, and an Ollama server with several
+        slots (OLLAMA_NUM_PARALLEL) works on them at the same time.
+
+        Returns:
+            list: Merged recommendations ranked by potential_savings, or None
+        """
+        service_costs = sorted(analysis['service_costs'].items(), key=lambda x: x[1], reverse=True)
+        services = [(service, cost) for service, cost in service_costs if cost > 0][:self.max_services]
+        if not services:
+            print(" No billed services to optimize")
+            return None
+
+        workers = min(len(services), self.workers or server_parallelism())
+        print(f"Generating recommendations for {len(services)} services ({workers} in parallel)...")
+
+        def request(service, cost):
+            prompt, _ = self.build_service_prompt(profile, analysis, service, cost)
+            return self.llm.call_llm_for_json(prompt, expected_type="array",
+                                              schema="recommendations", json_reminder=False)
+
+        started = time.perf_counter()
+        groups = []
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # Each request runs in a copy of this context so its trace spans nest under the stage
+            futures = {pool.submit(contextvars.copy_context().run, request, service, cost): service
+                       for service, cost in services}
+            for future in as_completed(futures):
+                result = future.result()
+                if not result:
+                    print(f" No recommendations for {futures[future]}")
+                    continue
+                if not groups:
+                    first_ms = (time.perf_counter() - started) * 1000
+                    print(f" First recommendations ({futures[future]}) after {first_ms / 1000:.1f}s")
+                    span = current_span()
+                    if span is not None:
+                        span.set(first_result_ms=round(first_ms, 3))
+                groups.append(result)
+
+        recommendations = merge_recommendations(groups)
+        if not recommendations:
+            print(" Failed to generate recommendations")
+            return None
+
+        print(f" Generated {len(recommendations)} recommendations")
+        return recommendations
+
+    @traced("stage.analysis")
+    def create_report(self, profile, billing, analysis=None):
+        if analysis is None:
+            analysis = self.analyze_costs(profile, billing)
         
         recommendations = self.generate_recommendations(profile, billing, analysis)
         if not recommendations:
             return None
         
-        total_savings = sum(rec.get('potential_savings', 0) for rec in recommendations)
+        # Alternatives for the same service/resource count once, compatible changes stack
+        plan = select_savings(recommendations, self.effort_budget)
+        selected = set(plan['selected'])
+        for i, rec in enumerate(recommendations):
+            rec['selected'] = i in selected
+
+        total_savings = plan['combined_savings']
         current_cost = analysis['total_monthly_cost']
         savings_percentage = (total_savings / current_cost * 100) if current_cost > 0 else 0
         
@@ -132,23 +372,69 @@ Generate 6-10 diverse recommendations now. Respond with ONLY the JSON array:"""
             "summary": {
                 "total_potential_savings": round(total_savings, 2),
                 "savings_percentage": round(savings_percentage, 2),
+                "claimed_savings": plan['claimed_savings'],
+                "risk_adjusted_savings": plan['risk_adjusted_savings'],
                 "recommendations_count": len(recommendations),
+                "selected_recommendations": len(selected),
+                "effort_points": plan['effort_points'],
                 "high_impact_recommendations": high_impact
             }
         }
         
         return report
     
-    def run(self):
-        profile = load_json("project_profile.json")
+    def load_billing(self, output_dir=""):
+        """
+        Billing records of mock_billing.json.
+
+        Maps the columnar copy (mock_billing.cols) when it was written from
+        the current JSON file; otherwise parses and validates the JSON and
+        writes the columnar copy for the next run.
+
+        Returns:
+            ColumnarBilling, BillingRecordStore or None
+        """
+        artifact = os.path.join(output_dir, "mock_billing.json")
+        cache = columnar_path(artifact)
+        billing = load_columnar(cache, source=get_output_path(artifact))
+        if billing is not None:
+            return billing
+
+        raw_billing = load_bytes(artifact)
+        if not raw_billing:
+            print("\n Could not load mock_billing.json")
+            return None
+
+        # One compiled pydantic pass parses, coerces and validates every record
+        billing, errors = validate_billing_json(raw_billing)
+        if errors:
+            print("\n Invalid records in mock_billing.json:")
+            for error in errors:
+                print(f"   {error}")
+            return None
+        # Keep the records in the compact store rather than as one model object per row
+        billing = BillingRecordStore.from_records(billing)
+        save_columnar(cache, billing, source=get_output_path(artifact))
+        return billing
+
+    def run(self, output_dir="", force=False, billing_file=None):
+        profile = load_json(os.path.join(output_dir, "project_profile.json"))
         if not profile:
             print("\n Could not load project_profile.json")
             return False
 
-        billing = load_json("mock_billing.json")
-        if not billing:
-            print("\n Could not load mock_billing.json")
+        if billing_file:
+            return self.run_billing_file(profile, billing_file, output_dir, force)
+
+        billing = self.load_billing(output_dir)
+        if billing is None:
             return False
+
+        artifact = os.path.join(output_dir, "cost_optimization_report.json")
+        fingerprint = self.fingerprint(profile, billing)
+        if not force and is_up_to_date(artifact, fingerprint):
+            print("\n Profile and billing unchanged, reusing cost_optimization_report.json")
+            return True
         
         print(f"\nAnalyzing costs for: {profile.get('name', 'Unknown')}")
         print("-" * 80)
@@ -157,31 +443,72 @@ Generate 6-10 diverse recommendations now. Respond with ONLY the JSON array:"""
         if not report:
             return False
         
-        if not validate_cost_report(report):
+        if not validate_cost_report(report, self.min_recommendations):
             print(" Generated report is invalid")
             return False
         
-        if save_json("cost_optimization_report.json", report):
-            analysis = report['analysis']
-            summary = report['summary']
-            
-            print(f"\n{'='*80}")
-            print(f"  COST ANALYSIS SUMMARY")
-            print(f"{'='*80}")
-            print(f"  Total Cost: {format_currency(analysis['total_monthly_cost'])}")
-            print(f"  Budget: {format_currency(analysis['budget'])}")
-            print(f"  Variance: {format_currency(analysis['budget_variance'])} ", end='')
-            print(f"({'OVER BUDGET' if analysis['is_over_budget'] else 'UNDER BUDGET'})")
-            print(f"\n  Potential Savings: {format_currency(summary['total_potential_savings'])}")
-            print(f"  Savings %: {summary['savings_percentage']:.1f}%")
-            print(f"  Recommendations: {summary['recommendations_count']}")
-            print(f"  High Impact: {summary['high_impact_recommendations']}")
-            print(f"{'='*80}\n")
-            
+        if save_json(artifact, report):
+            record_fingerprint(artifact, fingerprint)
+            self.print_summary(report)
             return True
         
         return False
 
+    def run_billing_file(self, profile, billing_file, output_dir="", force=False):
+        print(f"\nAnalyzing billing export {billing_file} for: {profile.get('name', 'Unknown')}")
+        print("-" * 80)
+
+        billing = self.load_billing_file(billing_file, output_dir)
+        if billing is None:
+            print(f"\n No valid billing records in {billing_file}")
+            return False
+
+        # Fingerprinted like a mock-billing report, so neither is mistaken for the other
+        artifact = os.path.join(output_dir, "cost_optimization_report.json")
+        fingerprint = self.fingerprint(profile, billing)
+        if not force and is_up_to_date(artifact, fingerprint):
+            print("\n Profile and billing export unchanged, reusing cost_optimization_report.json")
+            return True
+
+        report = self.create_report(profile, billing)
+        if not report or not validate_cost_report(report, self.min_recommendations):
+            print(" Generated report is invalid")
+            return False
+
+        if save_json(artifact, report):
+            record_fingerprint(artifact, fingerprint)
+            self.print_summary(report)
+            return True
+
+        return False
+
+    def print_summary(self, report):
+        analysis = report['analysis']
+        summary = report['summary']
+        
+        print(f"\n{'='*80}")
+        print(f"  COST ANALYSIS SUMMARY")
+        print(f"{'='*80}")
+        print(f"  Monthly Cost{_month_suffix(analysis)}: {format_currency(analysis['total_monthly_cost'])}")
+        print(f"  Budget: {format_currency(analysis['budget'])}")
+        print(f"  Variance: {format_currency(analysis['budget_variance'])} ", end='')
+        print(f"({'OVER BUDGET' if analysis['is_over_budget'] else 'UNDER BUDGET'})")
+        if 'trends' in analysis:
+            forecast = analysis['trends']['forecast']
+            print(f"  Forecast {forecast['month']}: {format_currency(forecast['cost'])} "
+                  f"({'OVER BUDGET' if forecast['is_over_budget'] else 'UNDER BUDGET'})")
+            anomalies = analysis['trends'].get('anomalies', [])
+            if anomalies:
+                print(f"  Anomalous resources: {len(anomalies)}")
+        print(f"\n  Potential Savings: {format_currency(summary['total_potential_savings'])}")
+        if 'claimed_savings' in summary and summary['claimed_savings'] != summary['total_potential_savings']:
+            print(f"  Claimed by all recommendations (before overlap): {format_currency(summary['claimed_savings'])} "
+                  f"({summary['selected_recommendations']} can be combined)")
+        print(f"  Savings %: {summary['savings_percentage']:.1f}%")
+        print(f"  Recommendations: {summary['recommendations_count']}")
+        print(f"  High Impact: {summary['high_impact_recommendations']}")
+        print(f"{'='*80}\n")
+
 if __name__ == "__main__":
     analyzer = CostAnalyzer()
     analyzer.run()
\ No newline at end of file
@@ -1,23 +1,49 @@
 import os
 import traceback
 import sys 
-from profile_extractor import ProfileExtractor
-from billing_generator import BillingGenerator
-from cost_analyzer import CostAnalyzer
 from utils import (
-    save_text, load_json, print_seperator, print_header,
+    save_text, load_text, load_json, print_seperator, print_header,
     format_currency, ensure_output_dir
 )
 
 class CostOptimizer:
-    def __init__(self):
-        self.profile_extractor = ProfileExtractor()
-        self.billing_generator = BillingGenerator()
-        self.cost_analyzer = CostAnalyzer()
+    def __init__(self, interactive=True):
+        self.interactive = interactive
+        # Stages are built on first use so the view/export options never load the LLM stack
+        self._profile_extractor = None
+        self._billing_generator = None
+        self._cost_analyzer = None
         ensure_output_dir()
 
+    @property
+    def profile_extractor(self):
+        if self._profile_extractor is None:
+            from profile_extractor import ProfileExtractor
+            self._profile_extractor = ProfileExtractor()
+        return self._profile_extractor
+
+    @property
+    def billing_generator(self):
+        if self._billing_generator is None:
+            from billing_generator import BillingGenerator
+            self._billing_generator = BillingGenerator()
+        return self._billing_generator
+
+    @property
+    def cost_analyzer(self):
+        if self._cost_analyzer is None:
+            from cost_analyzer import CostAnalyzer
+            self._cost_analyzer = CostAnalyzer()
+        return self._cost_analyzer
+
     def clear_screen(self):
-        os.system('cls' if os.name == 'nt' else 'clear')
+        if self.interactive:
+            os.system('cls' if os.name == 'nt' else 'clear')
+
+    def pause(self, message):
+        # Headless callers (scripts, --view/--export) never block on input
+        if self.interactive:
+            input(message)
     
     def show_menu(self):
         print_header("CLOUD COST OPTIMIZER - AI Powered Tool")
@@ -51,7 +77,7 @@ class CostOptimizer:
 
         if not description:
             print("\n No description is provided")
-            input("\n Press Enter to continue ...")
+            self.pause("\n Press Enter to continue ...")
             return False
         
         if save_text("project_description.txt",description):
@@ -60,11 +86,20 @@ class CostOptimizer:
             print(description[:300] + ("..." if len(description) > 300 else ""))
             print("-" * 30)
         
-        input("\nPress Enter to continue...")
+        self.pause("\nPress Enter to continue...")
         return True
     
     def run_complete_analysis(self):
-        # Option 2: Run the complete pipeline
+        # Option 2: Run the complete pipeline, then report where the time went
+        from tracing import get_tracer
+        tracer = get_tracer()
+        tracer.start_trace()
+        try:
+            return self.run_stages()
+        finally:
+            tracer.finish_trace()
+
+    def run_stages(self):
         self.clear_screen()
         print_header("RUNNING COMPLETE COST ANALYSIS")
 
@@ -73,29 +108,29 @@ class CostOptimizer:
         print("-"*30)
         if not self.profile_extractor.run():
             print("Profile extraction failed")
-            input("\nPress Enter to continue...")
+            self.pause("\nPress Enter to continue...")
             return False 
         
         print("Profile Extraction completed succesfully")
-        input("\nPress Enter to continue to billing generation...")
+        self.pause("\nPress Enter to continue to billing generation...")
 
         #Step 2: Synthetic billing generation
         print("\n[Step 2/3] Generating Synthetic billing...")
         print("-"*30)
         if not self.billing_generator.run():
             print("\n Billing generation failed")
-            input("\n Press Enter to continue...")
+            self.pause("\n Press Enter to continue...")
             return False 
         
         print("\n Billing generation completed")
-        input("\nPress Enter to continue to cost analysis...")
+        self.pause("\nPress Enter to continue to cost analysis...")
 
         # Step 3: Analyze the costs
         print("\n [Step 3/3] Generating the detailed cost analysis...")
         print("-"*30)
         if not self.cost_analyzer.run():
             print("\n Cost Analysis failed")
-            input("\n Press Enter to continue...")
+            self.pause("\n Press Enter to continue...")
             return False
         
         print("\n Cost Analysis Completed")
@@ -114,15 +149,17 @@ class CostOptimizer:
         report = load_json("cost_optimization_report.json")
         if not report:
             print("No report found. ")
-            input("\n Press Enter to continue...")
+            self.pause("\n Press Enter to continue...")
             return False
         
         analysis = report.get('analysis',{})
         summary = report.get('summary',{})
         recommendation = report.get('recommendations',{})
+        # Multi-month reports compare the latest month with the budget
+        month = f" ({analysis['cost_month']})" if 'cost_month' in analysis else ""
         
         print(f"Project: {report.get('project_name', 'Unknown')}")
-        print(f"Total Cost: {format_currency(analysis.get('total_monthly_cost', 0))}")
+        print(f"Monthly Cost{month}: {format_currency(analysis.get('total_monthly_cost', 0))}")
         print(f"Budget: {format_currency(analysis.get('budget', 0))}")
         print(f"Variance: {format_currency(analysis.get('budget_variance', 0))} ", end='')
         print(f"({'OVER BUDGET' if analysis.get('is_over_budget', False) else 'UNDER BUDGET'})")
@@ -147,9 +184,10 @@ class CostOptimizer:
             print(f"... and {len(recommendation) - 5} more recommendations")
             print("(See cost_optimization_report.json for full details)")
         
-        input("\nPress Enter to continue...")
+        self.pause("\nPress Enter to continue...")
+        return True
 
-    def export_report(self):
+    def export_report(self, choice=None):
         # Option 4: Export report in different formats
         self.clear_screen()
         print_header("EXPORT REPORT")
@@ -158,16 +196,17 @@ class CostOptimizer:
         report = load_json("cost_optimization_report.json")
         if not report:
             print(" No report found. ")
-            input("\nPress Enter to continue...")
-            return
-        
-        print("Available export formats:")
-        print("1. JSON (already saved)")
-        print("2. Text Summary")
-        print("3. Both")
-        print()
+            self.pause("\nPress Enter to continue...")
+            return False
         
-        choice = input("Select format (1-3): ").strip()
+        if choice is None:
+            print("Available export formats:")
+            print("1. JSON (already saved)")
+            print("2. Text Summary")
+            print("3. Both")
+            print()
+            
+            choice = input("Select format (1-3): ").strip()
         
         if choice in ['2', '3']:
             # Generate text summary
@@ -179,12 +218,21 @@ class CostOptimizer:
             print("\n JSON report available at outputs/cost_optimization_report.json")
         
         print("\nAll files are in the 'outputs/' directory")
-        input("\nPress Enter to continue...")
+        self.pause("\nPress Enter to continue...")
+        return True
     
     def generate_text_summary(self, report):
         analysis = report.get('analysis', {})
         summary = report.get('summary', {})
         recommendations = report.get('recommendations', [])
+        # Multi-month reports compare the latest month with the budget
+        month = f" ({analysis['cost_month']})" if 'cost_month' in analysis else ""
+        cost_label = f"Monthly Cost{month}:"
+        # Reports written before overlap handling have no claimed_savings
+        claimed_line = ""
+        if 'claimed_savings' in summary and summary['claimed_savings'] != summary.get('total_potential_savings'):
+            claimed_line = (f"Claimed by all recommendations (before overlap): "
+                            f"{format_currency(summary['claimed_savings'])}\n")
         
         text = f"""
 {'='*20}
@@ -198,7 +246,7 @@ Generated: {report.get('generated_date', 'N/A')}
 COST ANALYSIS
 {'='*20}
 
-Total Monthly Cost:    {format_currency(analysis.get('total_monthly_cost', 0))}
+{cost_label:22s} {format_currency(analysis.get('total_monthly_cost', 0))}
 Budget:                {format_currency(analysis.get('budget', 0))}
 Budget Variance:       {format_currency(analysis.get('budget_variance', 0))}
 Status:                {'OVER BUDGET' if analysis.get('is_over_budget', False) else 'UNDER BUDGET'}
@@ -210,13 +258,28 @@ Cost Breakdown by Service:
         for service, cost in sorted(service_costs.items(), key=lambda x: x[1], reverse=True):
             text += f"  - {service:20s} {format_currency(cost)}\n"
         
+        trends = analysis.get('trends')
+        if trends:
+            text += "\nMonthly Trend:\n"
+            changes = {c['month']: c['change_pct'] for c in trends.get('month_over_month', [])}
+            for month, total in zip(trends['months'], trends['monthly_totals']):
+                change = f"  ({changes[month]:+.1f}%)" if month in changes else ""
+                text += f"  - {month:20s} {format_currency(total)}{change}\n"
+            forecast = trends['forecast']
+            text += (f"  Forecast {forecast['month']}:     {format_currency(forecast['cost'])} "
+                     f"({'OVER BUDGET' if forecast['is_over_budget'] else 'UNDER BUDGET'})\n")
+            for anomaly in trends.get('anomalies', []):
+                text += (f"  ! {anomaly['resource_id']} ({anomaly['service']}) {anomaly['month']}: "
+                         f"{format_currency(anomaly['cost_inr'])}, usually "
+                         f"{format_currency(anomaly['typical_cost_inr'])} (z={anomaly['z_score']})\n")
+        
         text += f"""
 {'='*20}
 OPTIMIZATION SUMMARY
 {'='*20}
 
 Total Potential Savings:       {format_currency(summary.get('total_potential_savings', 0))}
-Savings Percentage:            {summary.get('savings_percentage', 0):.1f}%
+{claimed_line}Savings Percentage:            {summary.get('savings_percentage', 0):.1f}%
 Total Recommendations:         {summary.get('recommendations_count', 0)}
 High-Impact Recommendations:   {summary.get('high_impact_recommendations', 0)}
 
@@ -231,7 +294,8 @@ DETAILED RECOMMENDATIONS
             text += f"   Service:           {rec.get('service', 'Unknown')}\n"
             text += f"   Type:              {rec.get('recommendation_type', 'Unknown')}\n"
             text += f"   Current Cost:      {format_currency(rec.get('current_cost', 0))}\n"
-            text += f"   Potential Savings: {format_currency(rec.get('potential_savings', 0))}\n"
+            text += f"   Potential Savings: {format_currency(rec.get('potential_savings', 0))}"
+            text += "\n" if rec.get('selected', True) else " (alternative, not in total)\n"
             text += f"   Implementation:    {rec.get('implementation_effort', 'Unknown')} effort, {rec.get('risk_level', 'Unknown')} risk\n"
             text += f"   Cloud Providers:   {', '.join(rec.get('cloud_providers', []))}\n"
             text += f"   \n   Description:\n   {rec.get('description', 'N/A')}\n"
@@ -268,8 +332,169 @@ DETAILED RECOMMENDATIONS
                 print("Invalid Options. Please select 1-5")
                 input("\n Press Enter to continue..")
 
-def main():
+# Cold-start budget for the view/export path, measured with `python -X importtime`
+STARTUP_BUDGET_MS = 50
+HEAVY_MODULES = ("langchain", "langchain_core", "langchain_community", "pydantic", "requests")
+
+def measure_startup():
+    """
+    Measure the cold import of this module in a fresh interpreter.
+
+    Returns:
+        tuple: (cumulative import time in ms, heavy modules that were imported)
+    """
+    import subprocess
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import cost_optimizer"],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+
+    total_us = 0
+    heavy = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = [part.strip() for part in line[len("import time:"):].split("|")]
+        if not parts[1].isdigit():
+            continue
+        module = parts[2]
+        if module == "cost_optimizer":
+            total_us = int(parts[1])
+        top_level = module.split(".")[0]
+        if top_level in HEAVY_MODULES:
+            heavy.add(top_level)
+
+    return total_us / 1000, sorted(heavy)
+
+def check_startup(budget_ms=STARTUP_BUDGET_MS):
+    elapsed_ms, heavy = measure_startup()
+    print(f"Cold import of cost_optimizer: {elapsed_ms:.1f} ms (budget {budget_ms} ms)")
+    if heavy:
+        print(f"Heavy modules imported at startup: {', '.join(heavy)}")
+    return elapsed_ms <= budget_ms and not heavy
+
+def make_billing_generator(args):
+    from billing_generator import BillingGenerator
+    return BillingGenerator(mode=args.billing_mode, enrich=args.enrich_billing,
+                            months=args.months, replicas=args.replicas)
+
+def make_cost_analyzer(args):
+    from cost_analyzer import CostAnalyzer
+    return CostAnalyzer(per_service=args.per_service, mode=args.recommendation_mode,
+                        describe=args.describe_recommendations, effort_budget=args.effort_budget)
+
+def run_headless(description_file=None, force=False, billing_generator=None, cost_analyzer=None):
+    import asyncio
+    from pipeline import run_pipeline
+
+    if description_file:
+        try:
+            with open(description_file, 'r', encoding='utf-8') as f:
+                description = f.read().strip()
+        except OSError as e:
+            print(f"Could not read {description_file}: {str(e)}")
+            return False
+    else:
+        description = load_text("project_description.txt")
+
+    if not description:
+        print("No project description provided")
+        return False
+
+    from tracing import get_tracer
+    tracer = get_tracer()
+    tracer.start_trace()
+    try:
+        report = asyncio.run(run_pipeline(description, force=force, billing_generator=billing_generator,
+                                          cost_analyzer=cost_analyzer))
+    finally:
+        tracer.finish_trace()
+    if not report:
+        print("Cost analysis failed")
+        return False
+
+    summary = report['summary']
+    print(f"\n Project: {report['project_name']}")
+    print(f" Potential Savings: {format_currency(summary['total_potential_savings'])} "
+          f"({summary['savings_percentage']:.1f}%)")
+    return True
+
+def parse_args(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="AI-powered cloud cost optimizer")
+    parser.add_argument("--view", action="store_true",
+                        help="Print the saved recommendations and exit")
+    parser.add_argument("--export", choices=["json", "text", "both"],
+                        help="Export the saved report and exit")
+    parser.add_argument("--headless", action="store_true",
+                        help="Run the complete analysis without prompts and exit")
+    parser.add_argument("--description", metavar="FILE",
+                        help="Project description file for --headless (default: outputs/project_description.txt)")
+    parser.add_argument("--billing-file", metavar="FILE",
+                        help="Analyze a CSV/JSONL(.gz) billing export against the saved profile and exit")
+    parser.add_argument("--billing-mode", choices=["procedural", "llm"], default="procedural",
+                        help="How --headless/--batch generate billing data (default: procedural)")
+    parser.add_argument("--enrich-billing", action="store_true",
+                        help="Let the LLM write descriptions for procedurally generated billing records")
+    parser.add_argument("--months", type=int, default=1,
+                        help="Months of billing history to generate (default: 1)")
+    parser.add_argument("--replicas", type=int, default=1,
+                        help="Resources per tech stack component in procedural billing (default: 1)")
+    parser.add_argument("--per-service", action="store_true",
+                        help="Request recommendations per high-cost service, in parallel, and merge them")
+    parser.add_argument("--recommendation-mode", choices=["llm", "rules"], default="llm",
+                        help="How --headless/--batch produce recommendations; rules computes them from billing and local pricing (default: llm)")
+    parser.add_argument("--describe-recommendations", action="store_true",
+                        help="With --recommendation-mode rules, let the LLM write the descriptions")
+    parser.add_argument("--effort-budget", type=int, metavar="POINTS",
+                        help="Effort points (low=1, medium=2, high=3) of recommendations counted in the savings total")
+    parser.add_argument("--force", action="store_true",
+                        help="Re-run every stage even if its inputs are unchanged")
+    parser.add_argument("--batch", metavar="DIR",
+                        help="Analyze every *.txt project description in DIR and exit")
+    parser.add_argument("--workers", type=int,
+                        help="Projects analyzed in parallel with --batch (default: $OLLAMA_NUM_PARALLEL or 2)")
+    parser.add_argument("--otlp-file", metavar="FILE",
+                        help="Also export timing traces in OpenTelemetry OTLP/JSON format to outputs/FILE")
+    parser.add_argument("--check-startup", action="store_true",
+                        help="Fail if the cold start exceeds the startup budget")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
     try:
+        if args.check_startup:
+            sys.exit(0 if check_startup() else 1)
+
+        if args.otlp_file:
+            from tracing import get_tracer
+            get_tracer().otlp_file = args.otlp_file
+
+        if args.batch:
+            from batch_runner import run_batch
+            index = run_batch(args.batch, workers=args.workers, force=args.force,
+                              billing_generator=make_billing_generator(args),
+                              cost_analyzer=make_cost_analyzer(args))
+            sys.exit(0 if index and index["projects_succeeded"] == index["projects_total"] else 1)
+
+        if args.billing_file:
+            sys.exit(0 if make_cost_analyzer(args).run(force=args.force, billing_file=args.billing_file) else 1)
+
+        if args.headless:
+            sys.exit(0 if run_headless(args.description, force=args.force,
+                                       billing_generator=make_billing_generator(args),
+                                       cost_analyzer=make_cost_analyzer(args)) else 1)
+
+        if args.view or args.export:
+            cli = CostOptimizer(interactive=False)
+            ok = True
+            if args.view:
+                ok = cli.view_recommendation()
+            if args.export:
+                choice = {"json": "1", "text": "2", "both": "3"}[args.export]
+                ok = cli.export_report(choice=choice) and ok
+            sys.exit(0 if ok else 1)
+
         cli = CostOptimizer()
         cli.run()
     except KeyboardInterrupt:
@@ -282,5 +507,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-        
-
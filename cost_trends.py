@@ -0,0 +1,157 @@
+import numpy as np
+
+# Iglewicz and Hoaglin's cut-off for the modified z-score
+ANOMALY_THRESHOLD = 3.5
+MAX_ANOMALIES = 20
+FORECAST_METHODS = ("holt", "linear")
+
+def next_month(month):
+    year, number = (int(part) for part in month.split('-'))
+    return f"{year + number // 12:04d}-{number % 12 + 1:02d}"
+
+def month_service_matrix(table):
+    """
+    Cost per month and service from a BillingTable.
+
+    Returns:
+        tuple: (months in calendar order, services, months x services array)
+    """
+    matrix = table.pivot('month', 'service')
+    months = table.labels['month']
+    order = np.argsort(np.array(months, dtype=object), kind='stable')
+    return [months[i] for i in order], list(table.labels['service']), matrix[order]
+
+def month_over_month(totals):
+    # Change of each month against the previous one; the first month has no change
+    totals = np.asarray(totals, dtype=np.float64)
+    change = np.diff(totals)
+    previous = totals[:-1]
+    change_pct = np.divide(change * 100, previous, out=np.zeros_like(change), where=previous != 0)
+    return change, change_pct
+
+def forecast(series, method="holt", alpha=0.5, beta=0.3):
+    """
+    One-step-ahead forecast for each column of `series` (months x n).
+
+    "holt" is double exponential smoothing (level and trend); "linear" is a
+    least-squares trend line. Columns are forecast together, so the cost is
+    one vector operation per month whatever the number of services.
+    """
+    series = np.asarray(series, dtype=np.float64)
+    if series.ndim == 1:
+        return forecast(series[:, None], method, alpha, beta)[0]
+    months = series.shape[0]
+    if months == 1:
+        return series[0].copy()
+
+    if method == "linear":
+        x = np.arange(months, dtype=np.float64)
+        slope, intercept = np.polyfit(x, series, 1)
+        return np.maximum(intercept + slope * months, 0)
+    if method != "holt":
+        raise ValueError(f"Unknown forecast method: {method}")
+
+    level = series[0].copy()
+    trend = series[1] - series[0]
+    for row in series[1:]:
+        previous_level = level
+        level = alpha * row + (1 - alpha) * (level + trend)
+        trend = beta * (level - previous_level) + (1 - beta) * trend
+    return np.maximum(level + trend, 0)
+
+def robust_z_scores(matrix):
+    """
+    Modified z-score of every cell against its row's median.
+
+    Rows with a zero MAD (e.g. a steady 720-hour instance) fall back to the
+    mean absolute deviation, and rows that never change score zero.
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    median = np.median(matrix, axis=1, keepdims=True)
+    deviation = np.abs(matrix - median)
+    mad = np.median(deviation, axis=1, keepdims=True)
+    mean_ad = deviation.mean(axis=1, keepdims=True)
+    scale = np.where(mad > 0, mad / 0.6745, mean_ad / 0.7979)
+    return np.divide(matrix - median, scale, out=np.zeros_like(matrix), where=scale > 0)
+
+def resource_anomalies(table, months, threshold=ANOMALY_THRESHOLD, limit=MAX_ANOMALIES):
+    """
+    Resource-months whose cost is far from the resource's usual monthly cost.
+
+    Returns:
+        list: Anomaly dicts, largest |z| first
+    """
+    if len(months) < 3:
+        return []
+    matrix = table.pivot('resource_id', 'month')
+    order = np.argsort(np.array(table.labels['month'], dtype=object), kind='stable')
+    matrix = matrix[:, order]
+    scores = robust_z_scores(matrix)
+
+    flagged = np.argwhere(np.abs(scores) > threshold)
+    if not len(flagged):
+        return []
+    ranked = flagged[np.argsort(-np.abs(scores[flagged[:, 0], flagged[:, 1]]), kind='stable')][:limit]
+
+    # Service of each resource: the service code of its first record
+    resource_codes = table.codes['resource_id']
+    first = np.full(len(table.labels['resource_id']), -1, dtype=np.int64)
+    first[resource_codes[::-1]] = np.arange(len(resource_codes))[::-1]
+    services = table.labels['service']
+    medians = np.median(matrix, axis=1)
+
+    anomalies = []
+    for resource, month in ranked:
+        anomalies.append({
+            "resource_id": table.labels['resource_id'][resource],
+            "service": services[table.codes['service'][first[resource]]],
+            "month": months[month],
+            "cost_inr": round(float(matrix[resource, month]), 2),
+            "typical_cost_inr": round(float(medians[resource]), 2),
+            "z_score": round(float(scores[resource, month]), 2)
+        })
+    return anomalies
+
+def summarize_trends(months, totals, budget, method="holt"):
+    """
+    Month-over-month changes and next month's forecast against the budget.
+    """
+    totals = np.asarray(totals, dtype=np.float64)
+    change, change_pct = month_over_month(totals)
+    predicted = float(forecast(totals, method))
+    return {
+        "months": list(months),
+        "monthly_totals": [round(float(v), 2) for v in totals],
+        "month_over_month": [
+            {"month": month, "change": round(float(c), 2), "change_pct": round(float(p), 2)}
+            for month, c, p in zip(months[1:], change, change_pct)
+        ],
+        "forecast": {
+            "month": next_month(months[-1]),
+            "method": method,
+            "cost": round(predicted, 2),
+            "budget": budget,
+            "budget_variance": round(predicted - budget, 2),
+            "is_over_budget": predicted > budget
+        }
+    }
+
+def analyze_trends(table, budget, method="holt"):
+    """
+    Cost-over-time analysis of a BillingTable.
+
+    Returns:
+        dict: Monthly totals, month-over-month changes, per-service forecast,
+        next month's forecast against the budget and anomalous resources
+    """
+    months, services, matrix = month_service_matrix(table)
+    trends = summarize_trends(months, matrix.sum(axis=1), budget, method)
+
+    service_forecast = forecast(matrix, method)
+    latest = matrix[-1]
+    trends["services"] = {
+        service: {"latest": round(float(latest[i]), 2), "forecast": round(float(service_forecast[i]), 2)}
+        for i, service in enumerate(services)
+    }
+    trends["anomalies"] = resource_anomalies(table, months)
+    return trends
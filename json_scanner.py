@@ -0,0 +1,240 @@
+import json
+
+_CLOSERS = {"{": "}", "[": "]"}
+_TYPES = {"object": dict, "array": list}
+_decoder = json.JSONDecoder()
+
+class JSONStreamScanner:
+    """
+    Incremental, string-aware bracket scanner for streamed LLM output.
+
+    Text is fed chunk by chunk. The scanner waits for the first opening
+    bracket of either container type, then tracks nesting until that
+    top-level value is closed, so an array nested inside an object is never
+    taken for the answer. Brackets inside JSON strings are ignored. Once
+    `complete` is set, `start` and `end` give the span of the value in the
+    text fed so far. `boundary` is the end of the last complete element at
+    depth 1, used to recover truncated output.
+
+    `feed` only completes on a candidate that decodes as JSON, so prose such
+    as "Note [see below]: [...]" does not stop a stream at "[see below]". A
+    value of the other container type than the one asked for also completes;
+    the caller coerces it (see coerce_json_value).
+    """
+
+    def __init__(self):
+        self.pos = 0
+        self._chunks = []
+        self._reset()
+
+    def _reset(self):
+        self.stack = []
+        self.in_string = False
+        self.escape = False
+        self.start = -1
+        self.end = -1
+        self.boundary = -1
+        self.complete = False
+
+    def feed(self, chunk):
+        if self.complete:
+            return True
+        self._chunks.append(chunk)
+        if not self.scan(chunk):
+            return False
+
+        # A balanced candidate that is not JSON: rescan what was fed from just after its opener
+        text = "".join(self._chunks)
+        while not self._decodes(text):
+            begin = self.start + 1
+            self._reset()
+            self.pos = begin
+            if not self.scan(text, begin):
+                return False
+        return True
+
+    def _decodes(self, text):
+        try:
+            _decoder.raw_decode(text, self.start)
+        except json.JSONDecodeError:
+            return False
+        return True
+
+    def scan(self, text, begin=0):
+        # Positions are absolute over everything scanned, so a whole response
+        # can be scanned in place from `begin` without slicing it
+        if self.complete:
+            return True
+
+        offset = self.pos - begin
+        stack = self.stack
+        for i in range(begin, len(text)):
+            ch = text[i]
+            if not stack:
+                if ch in _CLOSERS:
+                    self.start = i + offset
+                    stack.append(_CLOSERS[ch])
+            elif self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == '\\':
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                    if len(stack) == 1 and stack[0] == ']':
+                        self.boundary = i + offset + 1
+            elif ch == '"':
+                self.in_string = True
+            elif ch in _CLOSERS:
+                stack.append(_CLOSERS[ch])
+            elif ch == '}' or ch == ']':
+                stack.pop()
+                if not stack:
+                    self.end = i + offset + 1
+                    self.pos = self.end
+                    self.complete = True
+                    return True
+                if len(stack) == 1:
+                    self.boundary = i + offset + 1
+            elif ch == ',' and len(stack) == 1:
+                self.boundary = i + offset
+
+        self.pos = len(text) + offset
+        return False
+
+def extract_json_value(text, expected_type=None):
+    """
+    Return the first top-level JSON value of `expected_type` in `text`, or None.
+
+    Candidates are decoded in place with raw_decode. Only a candidate that
+    fails to decode is copied out and repaired: single-quoted strings,
+    trailing commas and a truncated final element are fixed up. A value of
+    the other container type is skipped whole, never searched for a nested
+    match; coerce_json_value decides what it stands for.
+    """
+    if not text:
+        return None
+
+    wanted = _TYPES.get(expected_type, (dict, list))
+    pos = 0
+    while True:
+        start = _find_opener(text, "{[", pos)
+        if start == -1:
+            return None
+
+        try:
+            value, end = _decoder.raw_decode(text, start)
+            if isinstance(value, wanted):
+                return value
+            pos = end
+            continue
+        except json.JSONDecodeError:
+            pass
+
+        scanner = JSONStreamScanner()
+        scanner.pos = start
+        scanner.scan(text, start)
+
+        if scanner.complete:
+            fragment = text[start:scanner.end]
+        elif scanner.boundary > start:
+            # Truncated output: keep the complete elements and close the value
+            fragment = text[start:scanner.boundary] + scanner.stack[0]
+        else:
+            fragment = None
+
+        if fragment is not None:
+            try:
+                value = json.loads(_repair(fragment))
+                if isinstance(value, wanted):
+                    return value
+                if scanner.complete:
+                    pos = scanner.end
+                    continue
+            except json.JSONDecodeError:
+                pass
+
+        pos = scanner.end if scanner.complete else start + 1
+
+def _find_opener(text, openers, pos):
+    found = -1
+    for opener in openers:
+        idx = text.find(opener, pos)
+        if idx != -1 and (found == -1 or idx < found):
+            found = idx
+    return found
+
+def _repair(fragment):
+    # Normalise single-quoted strings and drop trailing commas in one pass
+    out = []
+    quote = None
+    escape = False
+    for ch in fragment:
+        if quote:
+            if escape:
+                escape = False
+                if ch == "'" and quote == "'":
+                    out[-1] = "'"
+                else:
+                    out.append(ch)
+            elif ch == '\\':
+                escape = True
+                out.append(ch)
+            elif ch == quote:
+                quote = None
+                out.append('"')
+            elif ch == '"':
+                out.append('\\"')
+            elif ch == '\n':
+                out.append('\\n')
+            else:
+                out.append(ch)
+            continue
+
+        if ch == '"' or ch == "'":
+            quote = ch
+            out.append('"')
+            continue
+
+        if ch == '}' or ch == ']':
+            k = len(out) - 1
+            while k >= 0 and out[k] in ' \t\r\n':
+                k -= 1
+            if k >= 0 and out[k] == ',':
+                del out[k]
+        out.append(ch)
+
+    return ''.join(out)
+
+def coerce_json_value(text, expected_type):
+    """
+    Last local repair before asking the model again: accept a JSON value of
+    the other container type when it clearly holds what was asked for, e.g. a
+    single object where an array was expected, or an object that only wraps
+    the array ({"recommendations": [...]}).
+    """
+    value = extract_json_value(text)
+    if expected_type == "array" and isinstance(value, dict):
+        if len(value) == 1 and isinstance(next(iter(value.values())), list):
+            return next(iter(value.values()))
+        return [value]
+    if expected_type == "object" and isinstance(value, list) and len(value) == 1 and isinstance(value[0], dict):
+        return value[0]
+    return None
+
+def describe_json_error(text, expected_type=None):
+    # Short, model-readable reason why `text` did not yield the expected JSON value
+    if not text or not text.strip():
+        return "the response was empty"
+    start = _find_opener(text, "{[", 0)
+    if start == -1:
+        return "no JSON value was found in the response"
+    try:
+        value, _ = _decoder.raw_decode(text, start)
+    except json.JSONDecodeError as e:
+        return f"invalid JSON: {e.msg} at line {e.lineno} column {e.colno}"
+    if expected_type and not isinstance(value, _TYPES[expected_type]):
+        return f"expected a JSON {expected_type} but got a JSON {'object' if isinstance(value, dict) else 'array'}"
+    if not value:
+        return f"the JSON {'object' if isinstance(value, dict) else 'array'} was empty"
+    return "the JSON value did not match the requested format"
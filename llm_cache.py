@@ -0,0 +1,139 @@
+import os
+import json
+import time
+import hashlib
+from pathlib import Path
+
+CACHE_DIR = os.path.join("outputs", ".llm_cache")
+
+class LLMCache:
+    """
+    Persistent cache of parsed LLM JSON responses.
+
+    Entries are keyed by a SHA-256 of the model name, sampling parameters,
+    expected JSON type and the fully formatted prompt. Only responses that
+    were parsed and type-checked are stored, so a bad answer is never replayed.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_entries=500, max_bytes=50 * 1024 * 1024,
+                 max_age_seconds=7 * 24 * 3600, bypass=False):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.bypass = bypass or os.environ.get("LLM_CACHE_BYPASS", "") not in ("", "0")
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, model_name, params, prompt, expected_type, schema=None):
+        # Entries of schema-checked requests never share a key with unchecked ones
+        payload = json.dumps({
+            "model": model_name,
+            "params": params,
+            "expected_type": expected_type,
+            "schema": schema,
+            "prompt": prompt
+        }, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key):
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key, expected_type):
+        if self.bypass:
+            return None
+
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, json.JSONDecodeError):
+            # Corrupt entry: drop it and treat as a miss
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        if self.max_age_seconds and time.time() - entry.get('created', 0) > self.max_age_seconds:
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        data = entry.get('data')
+        if not _matches_type(data, expected_type):
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return data
+
+    def put(self, key, data, expected_type):
+        if self.bypass or not _matches_type(data, expected_type):
+            return False
+
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self._entry_path(key)
+            tmp_path = path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"created": time.time(), "expected_type": expected_type, "data": data},
+                          f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f" Could not write LLM cache entry: {str(e)}")
+            return False
+
+        self.evict()
+        return True
+
+    def evict(self):
+        # Drop expired entries first, then the oldest ones until within the size limits
+        try:
+            entries = [(p, p.stat()) for p in self.cache_dir.glob('*.json')]
+        except OSError:
+            return 0
+
+        now = time.time()
+        removed = 0
+        kept = []
+        for path, stat in entries:
+            if self.max_age_seconds and now - stat.st_mtime > self.max_age_seconds:
+                self._remove(path)
+                removed += 1
+            else:
+                kept.append((path, stat))
+
+        kept.sort(key=lambda x: x[1].st_mtime)
+        total_bytes = sum(stat.st_size for _, stat in kept)
+        while kept and (len(kept) > self.max_entries or total_bytes > self.max_bytes):
+            path, stat = kept.pop(0)
+            self._remove(path)
+            total_bytes -= stat.st_size
+            removed += 1
+
+        return removed
+
+    def clear(self):
+        for path in self.cache_dir.glob('*.json'):
+            self._remove(path)
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "bypass": self.bypass}
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def _matches_type(data, expected_type):
+    if expected_type == "object":
+        return isinstance(data, dict) and bool(data)
+    if expected_type == "array":
+        return isinstance(data, list) and bool(data)
+    return False
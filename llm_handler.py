@@ -1,127 +1,211 @@
 import json
-from langchain_community.llms import Ollama
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import PydanticOutputParser
-from langchain_core.exceptions import OutputParserException
-from pydantic import BaseModel, Field
-from typing import List, Dict, Optional
+import time
+import threading
+from llm_cache import LLMCache
+from json_scanner import JSONStreamScanner, extract_json_value, coerce_json_value, describe_json_error
+from retry_policy import RetryPolicy, BACKOFF, FATAL
+from ollama_client import DEFAULT_BASE_URL
+from tracing import span, ollama_attributes
+from prompts import count_tokens
+
+DEFAULT_MODEL = "mistral:7b-instruct-q4_0"
 
 class LLMHandler:
-    def __init__(self):
+    def __init__(self, model_name=DEFAULT_MODEL, base_url=DEFAULT_BASE_URL, use_cache=True, stream=True,
+                 structured=True):
 
-        self.model_name = "mistral:7b-instruct-q4_0"
-        
-        try:
-            self.llm = Ollama(
-                model=self.model_name,
-                temperature=0.3,
-                base_url="http://localhost:11434",
-                timeout=180,  
-                num_predict=3000,  
-                top_k=40,
-                top_p=0.9,
-                repeat_penalty=1.1
-            )
-            print(f" Initialized LangChain with {self.model_name}")
-        except Exception as e:
-            print(f" Error initializing Ollama: {str(e)}")
-            print("\nMake sure Ollama is running:")
-            print("1. Open terminal and run: ollama serve")
-            print(f"2. Pull the model: ollama pull {self.model_name}")
-            raise
+        self.model_name = model_name
+        self.base_url = base_url
+        self.timeout = 180
+        self.model_params = {
+            "temperature": 0.3,
+            "num_predict": 3000,
+            "top_k": 40,
+            "top_p": 0.9,
+            "repeat_penalty": 1.1
+        }
+
+        # The HTTP client is created on first use, not when the stages are built
+        self._client = None
+        self.retry_policy = RetryPolicy(max_attempts=3)
+        # Stream tokens and stop as soon as the expected JSON value is complete
+        self.stream = stream
+        # Ask Ollama for schema-constrained JSON; text extraction stays as the fallback
+        self.structured_output = structured
+        self._format_lock = threading.Lock()
+        # Keep the model (and its cached prompt prefix) loaded between calls
+        self.keep_alive = "30m"
+        self.cache = LLMCache(bypass=not use_cache)
 
-        self.max_retries = 3
+    @property
+    def client(self):
+        if self._client is None:
+            from ollama_client import get_client
+            self._client = get_client(self.base_url, timeout=self.timeout)
+            print(f" Initialized Ollama client for {self.model_name}")
+        return self._client
 
     def check_ollama_running(self):
         try:
-            test_response = self.llm.invoke("Test")
+            self.client.generate(self.model_name, "Test", options={"num_predict": 1})
             return True
         except Exception as e:
             print(f" Ollama not responding: {str(e)}")
             return False
 
-    def call_llm(self, prompt, max_tokens=2000, temperature=0.3):
+    def call_llm(self, prompt, max_tokens=2000, temperature=0.3, expected_type=None):
         try:
-            print(f"Calling {self.model_name} via LangChain...")
-            
-            response = self.llm.invoke(prompt)
-            return response
-            
+            return self.generate_text(prompt, expected_type)
         except Exception as e:
             print(f"Error calling LLM: {str(e)}")
             return None
 
-    def extract_json(self, text):
-        if not text:
+    def generate_text(self, prompt, expected_type=None, deadline=None, output_format=None):
+        # Like call_llm, but errors are raised so the retry policy can classify them
+        with span("llm.generate", model=self.model_name, expected_type=expected_type,
+                  prompt_chars=len(prompt), prompt_tokens_estimate=count_tokens(prompt),
+                  stream=self.stream, structured=output_format is not None) as s:
+            print(f"Calling {self.model_name} via Ollama...")
+
+            timeout = self.timeout
+            if deadline is not None:
+                timeout = max(1.0, min(timeout, deadline - time.monotonic()))
+
+            metadata = {}
+            if not self.stream or expected_type is None:
+                response = self.client.generate(self.model_name, prompt, options=self.model_params,
+                                                metadata=metadata, timeout=timeout,
+                                                output_format=output_format, keep_alive=self.keep_alive)
+                s.set(**ollama_attributes(metadata))
+                return response
+
+            scanner = JSONStreamScanner()
+            stop_when = scanner.feed
+            if deadline is not None:
+                # A generation that runs past the deadline is cut off and parsed as it is
+                stop_when = lambda piece: scanner.feed(piece) or time.monotonic() > deadline
+            response = self.client.generate(self.model_name, prompt, options=self.model_params,
+                                            stream=True, stop_when=stop_when, metadata=metadata,
+                                            timeout=timeout, output_format=output_format,
+                                            keep_alive=self.keep_alive)
+            s.set(stopped_early=scanner.complete, **ollama_attributes(metadata))
+            if scanner.complete:
+                print(f" Complete JSON {expected_type} received, stopped generation early")
+                return response[:scanner.end]
+            return response
+
+    def extract_json(self, text, expected_type=None):
+        # Single linear scan with in-place decoding; damaged JSON is repaired
+        # here instead of costing another LLM round-trip
+        return extract_json_value(text, expected_type)
+
+    def output_format(self, expected_type, schema=None):
+        """
+        Ollama `format` for a request: the JSON schema of the named pydantic
+        type (see models.get_adapter), plain JSON mode for objects, or None.
+        """
+        if not self.structured_output:
             return None
-            
-        text = text.strip()
-        text = text.replace("```json", "").replace("```", "")
-        
-        try:
-            return json.loads(text)
-        except json.JSONDecodeError:
-            pass
-        
-        start_idx = text.find('{')
-        end_idx = text.rfind('}')
-        if start_idx != -1 and end_idx != -1:
-            try:
-                json_str = text[start_idx:end_idx + 1]
-                return json.loads(json_str)
-            except json.JSONDecodeError:
-                pass
-
-        start_idx = text.find('[')
-        end_idx = text.rfind(']')
-        if start_idx != -1 and end_idx != -1:
-            try:
-                json_str = text[start_idx:end_idx + 1]
-                return json.loads(json_str)
-            except json.JSONDecodeError:
-                pass
-        
-        return None
+        if schema is not None:
+            from models import get_json_schema
+            return get_json_schema(schema)
+        # Plain JSON mode only guarantees an object at the top level
+        return "json" if expected_type == "object" else None
+
+    def disable_structured_output(self):
+        # The handler is shared by concurrent stages and batch projects, so it is switched off once
+        with self._format_lock:
+            if self.structured_output:
+                self.structured_output = False
+                print(" Ollama rejected the output format, falling back to JSON extraction")
+
+    def call_llm_for_json(self, prompt, expected_type="object", schema=None, json_reminder=True):
+        # Prompts that already end with their own output instruction pass json_reminder=False
+        with span("llm.json", model=self.model_name, expected_type=expected_type, schema=schema) as s:
+            result = self._call_llm_for_json(prompt, expected_type, schema, json_reminder, s)
+            s.set(success=result is not None)
+            return result
+
+    def _call_llm_for_json(self, prompt, expected_type, schema, json_reminder, trace):
+        from langchain_core.prompts import PromptTemplate
 
-    def call_llm_for_json(self, prompt, expected_type="object"):
         json_prompt = PromptTemplate(
             input_variables=["prompt"],
             template="{prompt}\n\nIMPORTANT: Respond with ONLY valid JSON. No explanations, no markdown, no code blocks. Just the raw JSON."
         )
-        
-        for attempt in range(self.max_retries):
+        formatted_prompt = json_prompt.format(prompt=prompt) if json_reminder else prompt
+
+        output_format = self.output_format(expected_type, schema)
+        params = self.model_params if output_format is None else dict(self.model_params, format=output_format)
+        cache_key = self.cache.make_key(self.model_name, params, formatted_prompt, expected_type, schema)
+        cached = self.cache.get(cache_key, expected_type)
+        trace.set(cache_hit=cached is not None)
+        if cached is not None:
+            print(f" Using cached JSON {expected_type} (cache hits: {self.cache.hits})")
+            return cached
+
+        policy = self.retry_policy
+        deadline = policy.deadline()
+        request_prompt = formatted_prompt
+        for attempt in range(policy.max_attempts):
+            last_attempt = attempt == policy.max_attempts - 1
+            if time.monotonic() >= deadline:
+                print(f" Retry deadline of {policy.deadline_seconds}s reached")
+                trace.set(stop_reason="deadline")
+                return None
+            trace.set(attempts=attempt + 1, retries=attempt)
+
             try:
-                formatted_prompt = json_prompt.format(prompt=prompt)
-                
-                response_text = self.call_llm(formatted_prompt, max_tokens=3000)
-                
-                if not response_text:
-                    print(f" Failed to get response. Attempt {attempt + 1}/{self.max_retries}")
-                    continue
-                
-                json_data = self.extract_json(response_text)
-                
-                if json_data:
-                    if expected_type == "object" and isinstance(json_data, dict):
-                        print(" Successfully extracted JSON object")
-                        return json_data
-                    elif expected_type == "array" and isinstance(json_data, list):
-                        print(" Successfully extracted JSON array")
-                        return json_data
-                    else:
-                        print(f" Type mismatch: Expected {expected_type}, got {type(json_data).__name__}")
-                else:
-                    print(f" Could not extract valid JSON from response")
-                
-                if attempt < self.max_retries - 1:
-                    print(f"Retrying with stricter instructions... ({attempt + 2}/{self.max_retries})")
-                    prompt += "\n\nCRITICAL INSTRUCTION: You MUST respond with ONLY valid JSON format. Start immediately with { or [ character. No other text allowed."
-                    
+                try:
+                    response_text = self.generate_text(request_prompt, expected_type, deadline, output_format)
+                except Exception as e:
+                    if output_format is None or getattr(e, "status_code", None) != 400:
+                        raise
+                    # Older Ollama versions only know format="json" or no format at all;
+                    # the same attempt is repeated without it
+                    self.disable_structured_output()
+                    output_format = None
+                    response_text = self.generate_text(request_prompt, expected_type, deadline, output_format)
             except Exception as e:
-                print(f" Error in attempt {attempt + 1}: {str(e)}")
-                if attempt < self.max_retries - 1:
-                    continue
-        
+                kind = policy.classify(e)
+                print(f" Error in attempt {attempt + 1}/{policy.max_attempts}: {str(e)}")
+                if kind == FATAL:
+                    print(" Not retrying: this error will not go away on its own")
+                    trace.set(stop_reason="fatal", error=str(e))
+                    return None
+                if kind == BACKOFF and not last_attempt:
+                    delay = min(policy.backoff(attempt), max(0.0, deadline - time.monotonic()))
+                    print(f" Retrying in {delay:.1f}s...")
+                    time.sleep(delay)
+                continue
+
+            parse_started = time.perf_counter()
+            json_data = self.extract_json(response_text, expected_type)
+            if json_data is None:
+                # Repair-only pass: no new request if the answer just has the wrong shape
+                json_data = coerce_json_value(response_text, expected_type)
+            problem = None
+            if json_data and schema is not None:
+                # Only answers that type-check against the schema are returned or cached
+                from models import schema_errors
+                errors = schema_errors(schema, json_data)
+                if errors:
+                    problem = f"the JSON did not match the required fields: {'; '.join(errors[:3])}"
+            trace.add("parse_ms", round((time.perf_counter() - parse_started) * 1000, 3))
+
+            if json_data and problem is None:
+                print(f" Successfully extracted JSON {expected_type}")
+                self.cache.put(cache_key, json_data, expected_type)
+                return json_data
+
+            problem = problem or describe_json_error(response_text, expected_type)
+            print(f" Could not extract valid JSON from response: {problem}")
+            if not last_attempt:
+                print(f"Retrying with a corrective instruction... ({attempt + 2}/{policy.max_attempts})")
+                # Always built from the original prompt, so retries never get longer
+                request_prompt = formatted_prompt + policy.corrective_suffix(expected_type, problem)
+
+        trace.set(stop_reason="exhausted")
         print("✗ All retry attempts exhausted")
         return None
 
@@ -168,37 +252,29 @@ Respond with ONLY the JSON object, nothing else.'''
             print(f" Connection test failed: {str(e)}")
             return False
 
-class ProjectProfile(BaseModel):
-    name: str = Field(description="Project name")
-    budget_inr_per_month: float = Field(description="Monthly budget in INR")
-    description: str = Field(description="Project description")
-    tech_stack: Dict[str, str] = Field(description="Technology stack")
-    non_functional_requirements: List[str] = Field(description="Non-functional requirements", default=[])
-
-class BillingRecord(BaseModel):
-    month: str = Field(description="Month in YYYY-MM format")
-    service: str = Field(description="Cloud service name")
-    resource_id: str = Field(description="Resource identifier")
-    region: str = Field(description="Cloud region")
-    usage_type: str = Field(description="Usage type")
-    usage_quantity: float = Field(description="Usage quantity")
-    unit: str = Field(description="Unit of measurement")
-    cost_inr: float = Field(description="Cost in INR")
-    desc: str = Field(description="Description")
-
-class Recommendation(BaseModel):
-    title: str = Field(description="Recommendation title")
-    service: str = Field(description="Service name")
-    current_cost: float = Field(description="Current cost in INR")
-    potential_savings: float = Field(description="Potential savings in INR")
-    recommendation_type: str = Field(description="Type of recommendation")
-    description: str = Field(description="Detailed description")
-    implementation_effort: str = Field(description="Implementation effort level")
-    risk_level: str = Field(description="Risk level")
-    steps: List[str] = Field(description="Implementation steps")
-    cloud_providers: List[str] = Field(description="Applicable cloud providers")
+# The pydantic models live in models.py; they are re-exported lazily so that
+# importing this module does not pay for pydantic.
+_MODEL_NAMES = ("ProjectProfile", "BillingRecord", "Recommendation")
+
+def __getattr__(name):
+    if name in _MODEL_NAMES:
+        import models
+        return getattr(models, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+_handlers = {}
+_handlers_lock = threading.Lock()
 
+def get_llm_handler(model_name=DEFAULT_MODEL, base_url=DEFAULT_BASE_URL):
+    # Shared handler registry so all pipeline stages reuse one client and cache
+    key = (model_name, base_url)
+    with _handlers_lock:
+        handler = _handlers.get(key)
+        if handler is None:
+            handler = LLMHandler(model_name=model_name, base_url=base_url)
+            _handlers[key] = handler
+        return handler
 
 if __name__ == "__main__":
-    handler = LLMHandler()
+    handler = get_llm_handler()
     handler.test_connection()
\ No newline at end of file
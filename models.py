@@ -0,0 +1,100 @@
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from typing import List, Dict
+
+MAX_REPORTED_ERRORS = 20
+
+class ProjectProfile(BaseModel):
+    name: str = Field(description="Project name")
+    budget_inr_per_month: float = Field(description="Monthly budget in INR")
+    description: str = Field(description="Project description")
+    tech_stack: Dict[str, str] = Field(description="Technology stack")
+    non_functional_requirements: List[str] = Field(description="Non-functional requirements", default=[])
+
+class BillingRecord(BaseModel):
+    # Only month, service and cost_inr are required, as in the original hand-written checks
+    month: str = Field(description="Month in YYYY-MM format")
+    service: str = Field(description="Cloud service name")
+    resource_id: str = Field(description="Resource identifier", default="")
+    region: str = Field(description="Cloud region", default="")
+    usage_type: str = Field(description="Usage type", default="")
+    usage_quantity: float = Field(description="Usage quantity", default=0)
+    unit: str = Field(description="Unit of measurement", default="")
+    cost_inr: float = Field(description="Cost in INR")
+    desc: str = Field(description="Description", default="")
+
+class Recommendation(BaseModel):
+    title: str = Field(description="Recommendation title")
+    service: str = Field(description="Service name")
+    current_cost: float = Field(description="Current cost in INR")
+    potential_savings: float = Field(description="Potential savings in INR")
+    recommendation_type: str = Field(description="Type of recommendation")
+    description: str = Field(description="Detailed description")
+    implementation_effort: str = Field(description="Implementation effort level")
+    risk_level: str = Field(description="Risk level")
+    steps: List[str] = Field(description="Implementation steps")
+    cloud_providers: List[str] = Field(description="Applicable cloud providers")
+
+_adapters = {}
+
+def get_adapter(name):
+    # TypeAdapters compile a validator, so build each one once
+    adapter = _adapters.get(name)
+    if adapter is None:
+        adapter = TypeAdapter({
+            "billing": List[BillingRecord],
+            "recommendations": List[Recommendation],
+            "profile": ProjectProfile,
+        }[name])
+        _adapters[name] = adapter
+    return adapter
+
+_schemas = {}
+
+def get_json_schema(name):
+    # JSON schema of an adapter's type, sent to Ollama to constrain decoding
+    schema = _schemas.get(name)
+    if schema is None:
+        schema = get_adapter(name).json_schema()
+        _schemas[name] = schema
+    return schema
+
+def format_errors(error):
+    messages = []
+    for item in error.errors()[:MAX_REPORTED_ERRORS]:
+        location = item["loc"]
+        prefix = f"Record {location[0]}" if location and isinstance(location[0], int) else "Data"
+        field = ".".join(str(part) for part in location[1:]) if prefix != "Data" else ".".join(str(part) for part in location)
+        messages.append(f"{prefix}: {field}: {item['msg']}" if field else f"{prefix}: {item['msg']}")
+    if error.error_count() > MAX_REPORTED_ERRORS:
+        messages.append(f"... and {error.error_count() - MAX_REPORTED_ERRORS} more errors")
+    return messages
+
+def schema_errors(name, value):
+    # Validation messages of parsed JSON against a named adapter; empty when it matches
+    try:
+        get_adapter(name).validate_python(value)
+        return []
+    except ValidationError as e:
+        return format_errors(e)
+
+def validate_billing_json(raw):
+    """
+    Validate raw JSON bytes against list[BillingRecord] in one compiled pass.
+
+    Numeric strings are coerced and every invalid record is reported, not
+    just the first one.
+
+    Returns:
+        tuple: (list of BillingRecord or None, list of error messages)
+    """
+    try:
+        return get_adapter("billing").validate_json(raw), []
+    except ValidationError as e:
+        return None, format_errors(e)
+
+def validate_billing_records(records):
+    # Same as validate_billing_json, for records that are already parsed
+    try:
+        return get_adapter("billing").validate_python(records), []
+    except ValidationError as e:
+        return None, format_errors(e)
@@ -0,0 +1,133 @@
+import os
+import json
+import time
+import threading
+from tracing import OLLAMA_METRICS
+
+DEFAULT_BASE_URL = "http://localhost:11434"
+
+def server_parallelism():
+    # Requests the local Ollama server handles at once (its OLLAMA_NUM_PARALLEL)
+    try:
+        return max(1, int(os.environ.get("OLLAMA_NUM_PARALLEL", "2")))
+    except ValueError:
+        return 2
+
+class OllamaError(Exception):
+    """Error status from the Ollama API, with the message Ollama returned."""
+
+    def __init__(self, status_code, message):
+        super().__init__(f"Ollama returned {status_code}: {message}")
+        self.status_code = status_code
+        self.message = message
+
+class OllamaClient:
+    """
+    Minimal client for the Ollama HTTP API.
+
+    All requests go through one requests.Session, so every caller shares a
+    pool of keep-alive connections to the Ollama endpoint.
+    """
+
+    def __init__(self, base_url=DEFAULT_BASE_URL, timeout=180, pool_size=8):
+        # requests is imported here so that importing this module stays cheap
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def generate(self, model, prompt, options=None, stream=False, stop_when=None, metadata=None,
+                 timeout=None, output_format=None, keep_alive=None):
+        """
+        Run a completion against /api/generate.
+
+        With stream=True the response is consumed token by token. If
+        `stop_when` returns True for a received chunk, the connection is
+        closed straight away, which makes Ollama abort the generation.
+        If `metadata` is a dict, Ollama's token counts and durations are
+        copied into it. Streams also record client-side timings, which are
+        all a stream stopped before Ollama's final chunk has:
+        first_chunk_duration (request sent to first token, i.e. model load
+        and prompt eval) and stream_duration (first token to last), in ns.
+        Error statuses raise OllamaError; `timeout` overrides the client default.
+        `output_format` ("json" or a JSON schema dict) is sent as Ollama's
+        `format`, which constrains decoding to valid output. `keep_alive`
+        (e.g. "30m") keeps the model loaded after the request.
+        """
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": stream,
+            "options": options or {}
+        }
+        if output_format is not None:
+            payload["format"] = output_format
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        started = time.perf_counter_ns()
+        response = self.session.post(f"{self.base_url}/api/generate", json=payload,
+                                     timeout=timeout or self.timeout, stream=stream)
+        if response.status_code >= 400:
+            try:
+                message = response.json().get("error", response.reason)
+            except ValueError:
+                message = response.reason
+            finally:
+                response.close()
+            raise OllamaError(response.status_code, message)
+
+        if not stream:
+            data = response.json()
+            _copy_metrics(data, metadata)
+            return data.get("response", "")
+
+        pieces = []
+        first_chunk = None
+        try:
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                if first_chunk is None:
+                    first_chunk = time.perf_counter_ns()
+                chunk = json.loads(line)
+                piece = chunk.get("response", "")
+                pieces.append(piece)
+                if chunk.get("done"):
+                    _copy_metrics(chunk, metadata)
+                    break
+                if stop_when is not None and stop_when(piece):
+                    break
+        finally:
+            response.close()
+
+        if metadata is not None:
+            # Each streamed chunk is one generated token
+            metadata.setdefault("eval_count", len(pieces))
+            if first_chunk is not None:
+                metadata["first_chunk_duration"] = first_chunk - started
+                metadata["stream_duration"] = time.perf_counter_ns() - first_chunk
+        return "".join(pieces)
+
+    def close(self):
+        self.session.close()
+
+def _copy_metrics(data, metadata):
+    if metadata is not None:
+        metadata.update({key: data[key] for key in OLLAMA_METRICS if key in data})
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_client(base_url=DEFAULT_BASE_URL, timeout=180):
+    # One shared client (and connection pool) per Ollama endpoint
+    with _clients_lock:
+        client = _clients.get(base_url)
+        if client is None:
+            client = OllamaClient(base_url=base_url, timeout=timeout)
+            _clients[base_url] = client
+        return client
@@ -0,0 +1,201 @@
+import json
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Rough size of one model token, used to pace streamed responses
+CHARS_PER_TOKEN = 4
+
+MALFORMED_KINDS = ("truncated", "prose", "single_quotes", "trailing_comma", "empty")
+
+def split_tokens(text):
+    return [text[i:i + CHARS_PER_TOKEN] for i in range(0, len(text), CHARS_PER_TOKEN)]
+
+def malform(text, kind):
+    # Damaged variants of a valid JSON response, as small models tend to produce them
+    if kind == "truncated":
+        return text[:max(1, len(text) * 2 // 3)]
+    if kind == "prose":
+        return f"Sure! Here is the data you asked for:\n```json\n{text}\n```\nLet me know if you need anything else."
+    if kind == "single_quotes":
+        return text.replace('"', "'")
+    if kind == "trailing_comma":
+        return text[:-1] + ",\n" + text[-1:] if text else text
+    if kind == "empty":
+        return ""
+    raise ValueError(f"Unknown malformed kind: {kind}")
+
+class OllamaStub:
+    """
+    Local stand-in for the Ollama /api/generate endpoint.
+
+    The response text is chosen by the first route whose keyword appears in
+    the prompt. Latency, token rate and malformed responses are configurable,
+    so the pipeline can be timed without a real model.
+
+    Args:
+        routes: List of (keyword, response text) pairs
+        default: Response text when no route matches
+        latency: Seconds to wait before the first token
+        tokens_per_second: Generation speed; None sends tokens as fast as possible
+        malformed: One of MALFORMED_KINDS to damage responses, or None
+        malformed_every: Damage every n-th response (1 = all of them)
+        models: Model names to accept; others get Ollama's "model not found" error
+        reject_format: Answer requests with a `format` with 400, like Ollama
+            versions without structured outputs. Otherwise a `format` request
+            is never malformed, as constrained decoding guarantees valid JSON.
+    """
+
+    def __init__(self, routes=None, default="{}", latency=0.0, tokens_per_second=None,
+                 malformed=None, malformed_every=1, models=None, reject_format=False,
+                 host="127.0.0.1", port=0):
+        if malformed is not None and malformed not in MALFORMED_KINDS:
+            raise ValueError(f"Unknown malformed kind: {malformed}")
+        self.routes = list(routes or [])
+        self.default = default
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.malformed = malformed
+        self.malformed_every = max(1, malformed_every)
+        self.models = models
+        self.reject_format = reject_format
+        self.formats = []
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        self._server = ThreadingHTTPServer((self.host, self.port), _StubRequestHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def respond(self, prompt, output_format=None):
+        with self._lock:
+            self.requests += 1
+            self.formats.append(output_format)
+            count = self.requests
+        text = self.default
+        for keyword, response in self.routes:
+            if keyword in prompt:
+                text = response
+                break
+        if self.malformed and output_format is None and count % self.malformed_every == 0:
+            text = malform(text, self.malformed)
+        return text
+
+    def pace(self, started, tokens_sent):
+        # Sleep until `tokens_sent` tokens are due at the configured rate
+        if self.tokens_per_second:
+            delay = started + tokens_sent / self.tokens_per_second - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+    def metadata(self, prompt, tokens, started, load_started):
+        # Durations in nanoseconds, like Ollama's final response chunk
+        now = time.perf_counter()
+        return {
+            "done": True,
+            "total_duration": int((now - load_started) * 1e9),
+            "load_duration": int((started - load_started) * 1e9),
+            "prompt_eval_count": len(split_tokens(prompt)),
+            "prompt_eval_duration": 0,
+            "eval_count": tokens,
+            "eval_duration": int((now - started) * 1e9)
+        }
+
+class _StubRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def handle(self):
+        # Clients drop keep-alive connections and cut streams short; neither is an error here
+        try:
+            super().handle()
+        except ConnectionError:
+            pass
+
+    def send_json(self, status, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def write_chunk(self, data):
+        line = (json.dumps(data) + "\n").encode('utf-8')
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+        self.wfile.flush()
+
+    def do_POST(self):
+        stub = self.server.stub
+        if self.path != "/api/generate":
+            self.send_json(404, {"error": f"unknown endpoint {self.path}"})
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        except ValueError:
+            self.send_json(400, {"error": "invalid JSON body"})
+            return
+
+        model = body.get("model", "")
+        if stub.models is not None and model not in stub.models:
+            self.send_json(404, {"error": f"model '{model}' not found, try pulling it first"})
+            return
+
+        if "format" in body and stub.reject_format:
+            self.send_json(400, {"error": "invalid format"})
+            return
+
+        prompt = body.get("prompt", "")
+        load_started = time.perf_counter()
+        time.sleep(stub.latency)
+        started = time.perf_counter()
+        tokens = split_tokens(stub.respond(prompt, body.get("format")))
+
+        try:
+            if not body.get("stream", True):
+                stub.pace(started, len(tokens))
+                data = {"model": model, "response": "".join(tokens)}
+                data.update(stub.metadata(prompt, len(tokens), started, load_started))
+                self.send_json(200, data)
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i, token in enumerate(tokens):
+                stub.pace(started, i + 1)
+                self.write_chunk({"model": model, "response": token, "done": False})
+            final = {"model": model, "response": ""}
+            final.update(stub.metadata(prompt, len(tokens), started, load_started))
+            self.write_chunk(final)
+            self.wfile.write(b"0\r\n\r\n")
+        except ConnectionError:
+            # The client closed the stream early, as it does once the JSON is complete
+            self.close_connection = True
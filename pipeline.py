@@ -0,0 +1,137 @@
+import os
+import asyncio
+from utils import load_json, save_json, validate_cost_report, get_output_path
+from stage_cache import compute_fingerprint, is_up_to_date, record_fingerprint
+from models import validate_billing_records
+from record_store import BillingRecordStore
+from billing_columns import ColumnarBilling, columnar_path, load_columnar, save_columnar
+from tracing import span
+
+DEFAULT_CONCURRENCY = 2
+
+class PipelineRunner:
+    """
+    Async runner for the three-stage pipeline.
+
+    Each blocking stage call runs on a worker thread and goes through the
+    shared, pooled Ollama client. Artifact writes overlap with the next
+    stage, and up to `concurrency` projects are in flight at once. Stages
+    whose input fingerprint is unchanged reuse their saved artifact.
+    """
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, billing_generator=None, cost_analyzer=None):
+        from profile_extractor import ProfileExtractor
+        from billing_generator import BillingGenerator
+        from cost_analyzer import CostAnalyzer
+
+        self.profile_extractor = ProfileExtractor()
+        self.billing_generator = billing_generator or BillingGenerator()
+        self.cost_analyzer = cost_analyzer or CostAnalyzer()
+        self.concurrency = max(1, concurrency)
+        self._semaphore = None
+
+    @property
+    def semaphore(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    async def run_pipeline(self, description, output_dir="", force=False):
+        async with self.semaphore:
+            with span("pipeline", output_dir=output_dir):
+                return await self._run_stages(description, output_dir, force)
+
+    async def _run_stages(self, description, output_dir, force):
+        # Each stage is skipped when its fingerprint matches the saved artifact
+        profile_artifact = os.path.join(output_dir, "project_profile.json")
+        profile_fp = compute_fingerprint("profile", self.profile_extractor.PROMPT_VERSION,
+                                         self.profile_extractor.llm, description)
+        profile = self._load_fresh(profile_artifact, profile_fp, force)
+        saving_profile = None
+        if profile is None:
+            profile = await asyncio.to_thread(self.profile_extractor.extract_profile, description)
+            if not profile:
+                return None
+            # Persist each artifact while the next stage is already running
+            saving_profile = asyncio.create_task(asyncio.to_thread(
+                _save_artifact, profile_artifact, profile, profile_fp))
+
+        billing_artifact = os.path.join(output_dir, "mock_billing.json")
+        billing_fp = self.billing_generator.fingerprint(profile)
+        billing = self._load_fresh_billing(billing_artifact, billing_fp, force)
+        saving_billing = None
+        if billing is None:
+            billing = await asyncio.to_thread(self.billing_generator.generate_billing_response, profile)
+            if billing:
+                saving_billing = asyncio.create_task(asyncio.to_thread(
+                    _save_artifact, billing_artifact, billing, billing_fp))
+        if saving_profile:
+            await saving_profile
+        if not billing:
+            return None
+
+        # Generated billing is validated month by month; a reused artifact is validated here
+        if not isinstance(billing, (BillingRecordStore, ColumnarBilling)):
+            records, errors = validate_billing_records(billing)
+            if errors:
+                for error in errors:
+                    print(f" {error}")
+                return None
+            billing = BillingRecordStore.from_records(records)
+
+        report_artifact = os.path.join(output_dir, "cost_optimization_report.json")
+        report_fp = self.cost_analyzer.fingerprint(profile, billing)
+        report = self._load_fresh(report_artifact, report_fp, force)
+        if report is None:
+            report = await asyncio.to_thread(self.cost_analyzer.create_report, profile, billing)
+            if report and validate_cost_report(report, self.cost_analyzer.min_recommendations):
+                await asyncio.to_thread(_save_artifact, report_artifact, report, report_fp)
+            else:
+                report = None
+        if saving_billing:
+            await saving_billing
+        return report
+
+    def _load_fresh(self, artifact, fingerprint, force):
+        if force or not is_up_to_date(artifact, fingerprint):
+            return None
+        print(f" Inputs unchanged, reusing {artifact}")
+        return load_json(artifact)
+
+    def _load_fresh_billing(self, artifact, fingerprint, force):
+        # The columnar copy of a fresh mock_billing.json is mapped instead of parsed
+        if not force and is_up_to_date(artifact, fingerprint):
+            billing = load_columnar(columnar_path(artifact), source=get_output_path(artifact))
+            if billing is not None:
+                print(f" Inputs unchanged, mapping {columnar_path(artifact)}")
+                return billing
+        return self._load_fresh(artifact, fingerprint, force)
+
+    async def run_many(self, descriptions, output_dirs=None, force=False):
+        if output_dirs is None:
+            output_dirs = [""] * len(descriptions)
+        return await asyncio.gather(*(
+            self.run_pipeline(description, output_dir, force)
+            for description, output_dir in zip(descriptions, output_dirs)
+        ))
+
+def _save_artifact(artifact, data, fingerprint):
+    if isinstance(data, BillingRecordStore):
+        # Billing also gets a columnar copy, which later runs map instead of parsing the JSON
+        saved = data.save_json(artifact)
+        if saved:
+            save_columnar(columnar_path(artifact), data, source=get_output_path(artifact))
+    else:
+        saved = save_json(artifact, data)
+    if saved:
+        record_fingerprint(artifact, fingerprint)
+
+async def run_pipeline(description, output_dir="", force=False, billing_generator=None, cost_analyzer=None):
+    """
+    Run profile extraction, billing generation and cost analysis for one description.
+
+    Returns:
+        dict: The cost optimization report, or None if a stage failed
+    """
+    runner = PipelineRunner(billing_generator=billing_generator, cost_analyzer=cost_analyzer)
+    return await runner.run_pipeline(description, output_dir, force)
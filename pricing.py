@@ -0,0 +1,123 @@
+# Local on-demand price list in INR for ap-south-1 (Mumbai), converted from
+# published USD list prices at ~83 INR/USD. Used by the procedural billing
+# generator; accuracy is "realistic order of magnitude", not a quote.
+
+HOURS_PER_MONTH = 720
+
+# (service, usage_type) -> (category, unit, price per unit in INR)
+PRICE_LIST = {
+    ("EC2", "t3.micro"): ("compute", "hours", 0.93),
+    ("EC2", "t3.small"): ("compute", "hours", 1.86),
+    ("EC2", "t3.medium"): ("compute", "hours", 3.72),
+    ("EC2", "t3.large"): ("compute", "hours", 7.44),
+    ("EC2", "m5.large"): ("compute", "hours", 8.30),
+    ("EC2", "m5.xlarge"): ("compute", "hours", 16.60),
+    ("Lambda", "Lambda-GB-Second"): ("compute", "GB-seconds", 0.0014),
+    ("Lambda", "Requests"): ("compute", "million-requests", 16.60),
+    ("ECS", "Fargate-vCPU-Hours"): ("compute", "vCPU-hours", 3.36),
+
+    ("RDS", "db.t3.micro"): ("database", "hours", 1.66),
+    ("RDS", "db.t3.small"): ("database", "hours", 3.32),
+    ("RDS", "db.t3.medium"): ("database", "hours", 6.64),
+    ("RDS", "db.m5.large"): ("database", "hours", 14.94),
+    ("RDS", "gp2-Storage"): ("database", "GB-month", 10.96),
+    ("DocumentDB", "db.t3.medium"): ("database", "hours", 6.89),
+    ("DocumentDB", "Storage"): ("database", "GB-month", 9.13),
+    ("DynamoDB", "ReadWriteCapacity"): ("database", "million-requests", 103.75),
+    ("ElastiCache", "cache.t3.micro"): ("database", "hours", 1.41),
+
+    ("S3", "Standard"): ("storage", "GB-month", 1.95),
+    ("S3", "Standard-IA"): ("storage", "GB-month", 1.04),
+    ("S3", "Glacier-Instant-Retrieval"): ("storage", "GB-month", 0.42),
+    ("S3", "Requests-Tier1"): ("storage", "thousand-requests", 0.42),
+    ("EBS", "gp3"): ("storage", "GB-month", 7.57),
+    ("EBS", "Snapshot"): ("storage", "GB-month", 4.15),
+
+    ("CloudFront", "DataTransfer-Out"): ("networking", "GB", 9.13),
+    ("ELB", "ALB-Hours"): ("networking", "hours", 1.87),
+    ("DataTransfer", "DataTransfer-Out"): ("networking", "GB", 9.46),
+    ("NAT Gateway", "NatGateway-Hours"): ("networking", "hours", 4.73),
+
+    ("CloudWatch", "Metrics"): ("other", "metrics", 24.90),
+    ("CloudWatch", "Logs-Ingestion"): ("other", "GB", 44.82),
+    ("Route53", "HostedZone"): ("other", "hosted-zones", 41.50),
+    ("SecretsManager", "Secrets"): ("other", "secrets", 33.20),
+}
+
+# Share of the monthly budget per category
+CATEGORY_SPLIT = {
+    "compute": 0.40,
+    "database": 0.25,
+    "storage": 0.15,
+    "networking": 0.10,
+    "other": 0.10,
+}
+
+# Discount of a 1-year, no-upfront reservation against the on-demand hourly price
+RESERVED_DISCOUNTS = {
+    "EC2": 0.36,
+    "RDS": 0.31,
+    "ElastiCache": 0.30,
+}
+
+def _hourly_types():
+    types = {}
+    for (service, usage_type), (_, unit, price) in PRICE_LIST.items():
+        if unit == "hours":
+            types.setdefault(service, []).append((price, usage_type))
+    return {service: sorted(options) for service, options in types.items()}
+
+# service -> [(hourly price, usage_type)], cheapest first
+HOURLY_TYPES = _hourly_types()
+
+# AWS Cost and Usage Report names -> the price list's names
+CUR_SERVICES = {
+    "AmazonEC2": "EC2",
+    "AmazonRDS": "RDS",
+    "AmazonS3": "S3",
+    "AmazonElastiCache": "ElastiCache",
+    "Amazon Elastic Compute Cloud": "EC2",
+    "Amazon Relational Database Service": "RDS",
+    "Amazon Simple Storage Service": "S3",
+    "Amazon ElastiCache": "ElastiCache",
+}
+CUR_UNITS = {"hrs": "hours", "hour": "hours", "hours": "hours", "gb-mo": "GB-month", "gb-month": "GB-month"}
+# S3 storage usage types, without their region prefix ("APS3-")
+CUR_S3_STORAGE = {
+    "TimedStorage-ByteHrs": "Standard",
+    "TimedStorage-SIA-ByteHrs": "Standard-IA",
+    "TimedStorage-GIR-ByteHrs": "Glacier-Instant-Retrieval",
+}
+# Instance usage types such as "APS3-BoxUsage:t3.medium" or "InstanceUsage:db.t3.small"
+CUR_INSTANCE_USAGE = ("BoxUsage", "InstanceUsage", "Multi-AZUsage", "NodeUsage")
+
+def canonical_names(service, usage_type, unit):
+    """
+    Service, usage type and unit of a billing line in the price list's terms.
+
+    Generated billing already uses them; AWS Cost and Usage Report lines
+    ("AmazonEC2", "APS3-BoxUsage:t3.medium", "Hrs") are translated, and
+    anything unknown is returned unchanged.
+    """
+    service = CUR_SERVICES.get(service, service)
+    unit = CUR_UNITS.get(str(unit).lower(), unit)
+    kind, _, instance_type = usage_type.rpartition(":")
+    if instance_type and kind.endswith(CUR_INSTANCE_USAGE):
+        usage_type = instance_type
+    else:
+        for storage, storage_class in CUR_S3_STORAGE.items():
+            if usage_type == storage or usage_type.endswith("-" + storage):
+                usage_type = storage_class
+                break
+    return service, usage_type, unit
+
+def get_price(service, usage_type):
+    return PRICE_LIST.get((service, usage_type))
+
+def smaller_hourly_type(service, usage_type):
+    # Next cheaper instance size of the same service, or None
+    options = HOURLY_TYPES.get(service, [])
+    for i, (_, option_type) in enumerate(options):
+        if option_type == usage_type:
+            return options[i - 1] if i > 0 else None
+    return None
@@ -0,0 +1,244 @@
+import re
+import json
+import random
+import hashlib
+from pricing import PRICE_LIST, CATEGORY_SPLIT, HOURS_PER_MONTH, HOURLY_TYPES
+
+# Bump when the generation rules change so cached billing data is regenerated
+GENERATOR_VERSION = 3
+
+DEFAULT_REGION = "ap-south-1"
+
+# Tech stack keyword -> billed components as (service, usage_type, resource prefix, description)
+TECH_COMPONENTS = {
+    "react": [("S3", "Standard", "s3-frontend", "Static frontend assets"),
+              ("CloudFront", "DataTransfer-Out", "cf-frontend", "CDN for the frontend")],
+    "angular": [("S3", "Standard", "s3-frontend", "Static frontend assets"),
+                ("CloudFront", "DataTransfer-Out", "cf-frontend", "CDN for the frontend")],
+    "vue": [("S3", "Standard", "s3-frontend", "Static frontend assets"),
+            ("CloudFront", "DataTransfer-Out", "cf-frontend", "CDN for the frontend")],
+    "next": [("EC2", "t3.small", "i-web", "Next.js server"),
+             ("CloudFront", "DataTransfer-Out", "cf-frontend", "CDN for the frontend")],
+    "node": [("EC2", "t3.medium", "i-app", "Node.js application server"),
+             ("EBS", "gp3", "vol-app", "Application server volume")],
+    "express": [("EC2", "t3.medium", "i-app", "Express application server"),
+                ("EBS", "gp3", "vol-app", "Application server volume")],
+    "django": [("EC2", "t3.medium", "i-app", "Django application server"),
+               ("EBS", "gp3", "vol-app", "Application server volume")],
+    "flask": [("EC2", "t3.medium", "i-app", "Flask application server"),
+              ("EBS", "gp3", "vol-app", "Application server volume")],
+    "fastapi": [("EC2", "t3.medium", "i-app", "FastAPI application server"),
+                ("EBS", "gp3", "vol-app", "Application server volume")],
+    "spring": [("EC2", "m5.large", "i-app", "Spring application server"),
+               ("EBS", "gp3", "vol-app", "Application server volume")],
+    "java": [("EC2", "m5.large", "i-app", "Java application server"),
+             ("EBS", "gp3", "vol-app", "Application server volume")],
+    "lambda": [("Lambda", "Lambda-GB-Second", "fn-api", "Serverless function compute"),
+               ("Lambda", "Requests", "fn-api-req", "Serverless function invocations")],
+    "serverless": [("Lambda", "Lambda-GB-Second", "fn-api", "Serverless function compute"),
+                   ("Lambda", "Requests", "fn-api-req", "Serverless function invocations")],
+    "docker": [("ECS", "Fargate-vCPU-Hours", "ecs-svc", "Containerised services on Fargate")],
+    "kubernetes": [("ECS", "Fargate-vCPU-Hours", "ecs-svc", "Containerised services on Fargate")],
+    "postgres": [("RDS", "db.t3.small", "db-main", "PostgreSQL database"),
+                 ("RDS", "gp2-Storage", "db-main-storage", "Database storage")],
+    "mysql": [("RDS", "db.t3.small", "db-main", "MySQL database"),
+              ("RDS", "gp2-Storage", "db-main-storage", "Database storage")],
+    "mariadb": [("RDS", "db.t3.small", "db-main", "MariaDB database"),
+                ("RDS", "gp2-Storage", "db-main-storage", "Database storage")],
+    "mongo": [("DocumentDB", "db.t3.medium", "docdb-main", "MongoDB-compatible cluster"),
+              ("DocumentDB", "Storage", "docdb-storage", "Cluster storage")],
+    "dynamo": [("DynamoDB", "ReadWriteCapacity", "ddb-main", "DynamoDB tables")],
+    "redis": [("ElastiCache", "cache.t3.micro", "cache-main", "Redis cache")],
+    "nginx": [("EC2", "t3.small", "i-proxy", "Nginx reverse proxy")],
+}
+
+# Keywords match whole words, optionally followed by one of these suffixes
+# ("Node.js", "NextJS", "PostgreSQL", "MongoDB"), so "java" does not match "JavaScript"
+KEYWORD_PATTERNS = {keyword: re.compile(rf"\b{keyword}(?:js|db|ql|sql)?\b") for keyword in TECH_COMPONENTS}
+
+# Line items every deployment has, whatever the tech stack
+BASELINE_COMPONENTS = [
+    ("S3", "Standard", "s3-backups", "Backups and artifacts"),
+    ("DataTransfer", "DataTransfer-Out", "dt-egress", "Internet egress"),
+    ("CloudWatch", "Metrics", "cw-metrics", "Monitoring metrics"),
+    ("CloudWatch", "Logs-Ingestion", "cw-logs", "Application logs"),
+    ("Route53", "HostedZone", "r53-zone", "DNS hosted zone"),
+]
+
+# Used when the tech stack leaves a category without any component
+CATEGORY_DEFAULTS = {
+    "compute": ("EC2", "t3.small", "i-app", "Application server"),
+    "database": ("RDS", "db.t3.micro", "db-main", "Database"),
+    "storage": ("EBS", "gp3", "vol-data", "Data volume"),
+    "networking": ("DataTransfer", "DataTransfer-Out", "dt-egress", "Internet egress"),
+    "other": ("CloudWatch", "Metrics", "cw-metrics", "Monitoring metrics"),
+}
+
+def profile_seed(profile):
+    payload = json.dumps(profile, sort_keys=True, ensure_ascii=False)
+    return int(hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16], 16)
+
+def month_labels(start_month, months):
+    year, month = (int(part) for part in start_month.split('-'))
+    labels = []
+    for _ in range(months):
+        labels.append(f"{year:04d}-{month:02d}")
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+    return labels
+
+def select_components(tech_stack):
+    # Match tech stack values such as "Node.js" or "PostgreSQL 15" against the keywords
+    components = []
+    seen = set()
+
+    def add(component):
+        if component[2] not in seen:
+            seen.add(component[2])
+            components.append(component)
+
+    for value in (tech_stack or {}).values():
+        text = str(value).lower()
+        for keyword, keyword_components in TECH_COMPONENTS.items():
+            if KEYWORD_PATTERNS[keyword].search(text):
+                for component in keyword_components:
+                    add(component)
+
+    for component in BASELINE_COMPONENTS:
+        add(component)
+
+    covered = {PRICE_LIST[(c[0], c[1])][0] for c in components}
+    for category, component in CATEGORY_DEFAULTS.items():
+        if category not in covered:
+            add(component)
+
+    return components
+
+def build_resources(components, replicas, min_resources, rng):
+    resources = []
+    for service, usage_type, prefix, desc in components:
+        category, unit, price = PRICE_LIST[(service, usage_type)]
+        for n in range(1, replicas + 1):
+            resources.append({
+                "service": service, "usage_type": usage_type, "category": category,
+                "unit": unit, "price": price, "resource_id": f"{prefix}-{n:02d}",
+                "desc": desc, "weight": rng.uniform(0.6, 1.4)
+            })
+
+    # Pad small stacks with extra replicas so a month has enough line items
+    i = 0
+    base = list(resources)
+    while len(resources) < min_resources and base:
+        template = base[i % len(base)]
+        count = sum(1 for r in resources if r["resource_id"].rsplit('-', 1)[0] == template["resource_id"].rsplit('-', 1)[0])
+        resources.append(dict(template, resource_id=f"{template['resource_id'].rsplit('-', 1)[0]}-{count + 1:02d}",
+                              weight=rng.uniform(0.6, 1.4)))
+        i += 1
+    return resources
+
+def _allocations(resources, target):
+    # Split a monthly target across resources by category share and weight
+    category_weights = {}
+    for r in resources:
+        category_weights[r["category"]] = category_weights.get(r["category"], 0) + r["weight"]
+    total_share = sum(CATEGORY_SPLIT[c] for c in category_weights)
+    return [target * CATEGORY_SPLIT[r["category"]] / total_share * r["weight"] / category_weights[r["category"]]
+            for r in resources]
+
+def size_hourly_resources(resources, target):
+    # Always-on resources get an instance size that fits their share of the budget
+    for r, allocation in zip(resources, _allocations(resources, target)):
+        if r["unit"] != "hours":
+            continue
+        options = HOURLY_TYPES[r["service"]]
+        price, usage_type = options[0]
+        for option_price, option_type in options:
+            if option_price * HOURS_PER_MONTH <= allocation:
+                price, usage_type = option_price, option_type
+        r["price"] = price
+        r["usage_type"] = usage_type
+        if price * HOURS_PER_MONTH <= allocation * 1.5:
+            r["hours"] = HOURS_PER_MONTH
+        else:
+            # Even the smallest size is too big for the budget: part-time (dev/test) usage
+            r["hours"] = max(72, round(allocation / price))
+
+class ProceduralBillingModel:
+    """
+    Resource layout and pricing for one project, built once from the profile.
+
+    Each month is generated independently from its own seeded random stream,
+    so any month (or chunk of months) can be produced, cached and
+    regenerated on its own and still match a full-history run.
+    """
+
+    def __init__(self, profile, start_month="2025-01", replicas=1, seed=None,
+                 region=DEFAULT_REGION, min_records=12):
+        self.seed = profile_seed(profile) if seed is None else seed
+        self.start_month = start_month
+        self.region = region
+        self.budget = float(profile.get('budget_inr_per_month') or 10000)
+
+        rng = random.Random(self.seed)
+        components = select_components(profile.get('tech_stack', {}))
+        self.resources = build_resources(components, max(1, replicas), min_records, rng)
+        size_hourly_resources(self.resources, self.budget)
+
+        usage_based = [r for r in self.resources if r["unit"] != "hours"]
+        if usage_based:
+            for r, share in zip(usage_based, _allocations(usage_based, 1.0)):
+                r["share"] = share
+        self.growth = rng.uniform(0.0, 0.03)
+        self.fixed_cost = sum(r["hours"] * r["price"] for r in self.resources if r["unit"] == "hours")
+
+    def month_records(self, month_index):
+        rng = random.Random(self.seed * 1000003 + month_index)
+        month = month_labels(self.start_month, month_index + 1)[-1]
+        target = self.budget * rng.uniform(0.92, 1.08) * (1 + self.growth) ** month_index
+        # Usage-based items share what the always-on resources leave, but never vanish
+        remaining = max(target - self.fixed_cost, target * 0.1)
+
+        records = []
+        for r in self.resources:
+            if r["unit"] == "hours":
+                quantity = r["hours"]
+            else:
+                quantity = round(remaining * r["share"] * rng.normalvariate(1.0, 0.05) / r["price"], 2)
+                quantity = max(quantity, 0.01)
+            records.append({
+                "month": month,
+                "service": r["service"],
+                "resource_id": r["resource_id"],
+                "region": self.region,
+                "usage_type": r["usage_type"],
+                "usage_quantity": quantity,
+                "unit": r["unit"],
+                "cost_inr": round(quantity * r["price"], 2),
+                "desc": r["desc"]
+            })
+        return records
+
+def generate_procedural_billing(profile, months=1, start_month="2025-01", replicas=1,
+                                seed=None, region=DEFAULT_REGION, min_records=12):
+    """
+    Generate synthetic billing records from the profile without calling the LLM.
+
+    Always-on resources bill a steady number of hours; the rest of the budget
+    goes to usage-based line items following CATEGORY_SPLIT, with per-month
+    growth and noise. The same profile and seed always give the same output.
+
+    Args:
+        profile: Project profile dict with tech_stack and budget_inr_per_month
+        months: Number of months to generate, starting at start_month ("YYYY-MM")
+        replicas: Resources per tech stack component
+        seed: Random seed; derived from the profile when None
+
+    Returns:
+        list: Billing record dicts
+    """
+    model = ProceduralBillingModel(profile, start_month, replicas, seed, region, min_records)
+    records = []
+    for month_index in range(months):
+        records.extend(model.month_records(month_index))
+    return records
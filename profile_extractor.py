@@ -1,9 +1,15 @@
-from llm_handler import LLMHandler
+import os
+from llm_handler import get_llm_handler
 from utils import load_text, save_json, validate_project_profile
+from stage_cache import compute_fingerprint, is_up_to_date, record_fingerprint
+from tracing import traced
 
 class ProfileExtractor:
+    # Bump when the extraction prompt changes so cached profiles are regenerated
+    PROMPT_VERSION = 1
+
     def __init__(self):
-        self.llm = LLMHandler()
+        self.llm = get_llm_handler()
     
     def create_extraction_prompt(self,description):
         prompt = f"""You are a cloud infrastructure analyst. Extract a structured project profile from the given description.
@@ -43,11 +49,12 @@ Now extract the profile from the description above. Respond with ONLY the JSON o
         
         return prompt
     
+    @traced("stage.profile")
     def extract_profile(self,description):
         print("Extracting project profile using LLM")
 
         prompt = self.create_extraction_prompt(description)
-        profile = self.llm.call_llm_for_json(prompt,expected_type="object")
+        profile = self.llm.call_llm_for_json(prompt,expected_type="object", schema="profile")
 
         if not profile:
             print("Failed to extract project profile")
@@ -60,13 +67,19 @@ Now extract the profile from the description above. Respond with ONLY the JSON o
         print("Project Profile extracted successfully")
         return profile
     
-    def run(self):
-        description = load_text("project_description.txt")
+    def run(self, output_dir="", force=False):
+        description = load_text(os.path.join(output_dir, "project_description.txt"))
         if not description:
             print("\n Could not load project_description.txt")
             print("Please ensure the file exists in the outputs/directory")
             return False
 
+        artifact = os.path.join(output_dir, "project_profile.json")
+        fingerprint = compute_fingerprint("profile", self.PROMPT_VERSION, self.llm, description)
+        if not force and is_up_to_date(artifact, fingerprint):
+            print("\n Project description unchanged, reusing project_profile.json")
+            return True
+
         print(f"\n Project Description ({len(description)}) characters")
         print("-"*20)
         print(description[:500] + "..." if len(description) > 500 else "")
@@ -76,7 +89,8 @@ Now extract the profile from the description above. Respond with ONLY the JSON o
         if not profile:
             return False 
         
-        if save_json("project_profile.json", profile):
+        if save_json(artifact, profile):
+            record_fingerprint(artifact, fingerprint)
             print(f"\n Project: {profile.get('name', 'Unknown')}")
             print(f" Budget: ₹{profile.get('budget_inr_per_month', 0):,}/month")
             print(f" Tech Stack: {', '.join(profile.get('tech_stack', {}).values())}")
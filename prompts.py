@@ -0,0 +1,86 @@
+import re
+import json
+
+# Letters split into ~4-character pieces, digits one token each (as in the
+# Llama/Mistral tokenizers), everything else one token per symbol or newline
+_TOKEN_PATTERN = re.compile(r"[^\W\d_]+|\d|\n|[^\s\w]|_")
+
+def count_tokens(text):
+    """
+    Approximate model token count of `text`, without loading a tokenizer.
+
+    Close enough for budgeting; the exact count Ollama used is reported as
+    prompt_tokens in the llm.generate trace spans.
+    """
+    tokens = 0
+    for match in _TOKEN_PATTERN.finditer(text):
+        piece = match.group()
+        tokens += (len(piece) + 3) // 4 if piece[0].isalpha() else 1
+    return tokens
+
+def compact_json(data):
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+
+class PromptBuilder:
+    """
+    Assemble a prompt from a static prefix and per-request sections.
+
+    The prefix (role, rules, output format) is identical for every request,
+    so Ollama can reuse its KV cache for it while the model is kept loaded;
+    everything request-specific goes after it. When the prompt exceeds
+    `budget` tokens, trailing lines of shrinkable sections are dropped first
+    (replaced by their overflow summary), then optional sections.
+    """
+
+    def __init__(self, prefix, budget=None):
+        self.prefix = prefix.strip()
+        self.budget = budget
+        self.sections = []
+
+    def add(self, text, optional=False):
+        self.sections.append({"lines": [text], "keep": 1, "optional": optional, "overflow": None})
+        return self
+
+    def add_lines(self, header, lines, keep=1, overflow=None):
+        # `overflow(dropped_lines)` returns the line that stands in for dropped lines
+        self.sections.append({"header": header, "lines": list(lines), "keep": keep,
+                              "optional": False, "overflow": overflow, "dropped": []})
+        return self
+
+    def render(self):
+        parts = [self.prefix]
+        for section in self.sections:
+            lines = list(section["lines"])
+            if section.get("dropped") and section["overflow"]:
+                lines.append(section["overflow"](section["dropped"]))
+            if "header" in section:
+                lines.insert(0, section["header"])
+            parts.append("\n".join(lines))
+        return "\n\n".join(part for part in parts if part)
+
+    def build(self):
+        """
+        Returns:
+            tuple: (prompt text, estimated token count)
+        """
+        prompt = self.render()
+        tokens = count_tokens(prompt)
+        if self.budget is None:
+            return prompt, tokens
+
+        shrinkable = [s for s in self.sections if s["overflow"] is not None]
+        while tokens > self.budget:
+            section = next((s for s in reversed(shrinkable) if len(s["lines"]) > s["keep"]), None)
+            if section is None:
+                section = next((s for s in reversed(self.sections) if s["optional"]), None)
+                if section is None:
+                    break
+                self.sections.remove(section)
+            else:
+                section["dropped"].insert(0, section["lines"].pop())
+            prompt = self.render()
+            tokens = count_tokens(prompt)
+
+        if tokens > self.budget:
+            print(f" Prompt is {tokens} tokens, over the budget of {self.budget}")
+        return prompt, tokens
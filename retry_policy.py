@@ -0,0 +1,66 @@
+import time
+import random
+
+# Ollama answers these for requests that cannot succeed on a retry (bad request, unknown model)
+FATAL_STATUS_CODES = (400, 401, 403, 404)
+
+RETRY = "retry"
+BACKOFF = "backoff"
+FATAL = "fatal"
+
+class RetryPolicy:
+    """
+    How LLMHandler.call_llm_for_json retries a request.
+
+    - Unusable answers are retried with one corrective suffix that quotes
+      the parse error; the suffix replaces the previous one, so the prompt
+      never grows across attempts.
+    - Connection errors, timeouts and 5xx/429 responses are retried after an
+      exponential backoff with jitter.
+    - Errors a retry cannot fix (e.g. model not found) stop immediately.
+    - All attempts share one deadline, which also caps each request timeout.
+    """
+
+    def __init__(self, max_attempts=3, deadline_seconds=300, base_delay=1.0, max_delay=20.0,
+                 jitter=0.5, max_error_chars=200, rng=None):
+        self.max_attempts = max(1, max_attempts)
+        self.deadline_seconds = deadline_seconds
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.max_error_chars = max_error_chars
+        self.rng = rng or random.Random()
+
+    def deadline(self):
+        return time.monotonic() + self.deadline_seconds
+
+    def classify(self, error):
+        """
+        Returns:
+            str: FATAL, BACKOFF (transient, wait before retrying) or RETRY
+        """
+        status = getattr(error, "status_code", None)
+        if status is None:
+            response = getattr(error, "response", None)
+            status = getattr(response, "status_code", None)
+        if status in FATAL_STATUS_CODES:
+            return FATAL
+        if status is not None and (status >= 500 or status == 429):
+            return BACKOFF
+
+        # requests' ConnectionError and Timeout both derive from OSError
+        if isinstance(error, (OSError, TimeoutError)):
+            return BACKOFF
+        return RETRY
+
+    def backoff(self, attempt):
+        # Exponential delay, randomised by +/- jitter so parallel callers spread out
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return delay * self.rng.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def corrective_suffix(self, expected_type, problem):
+        if len(problem) > self.max_error_chars:
+            problem = problem[:self.max_error_chars] + "..."
+        opener = "[" if expected_type == "array" else "{"
+        return (f"\n\nYour previous reply could not be used ({problem}). "
+                f"Reply again with ONLY the JSON {expected_type}, starting with {opener}.")
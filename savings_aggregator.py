@@ -0,0 +1,185 @@
+import numpy as np
+
+# Types that replace the whole service, so they exclude any other change to it
+EXCLUSIVE_TYPES = ("alternative_provider", "open_source", "free_tier")
+
+EFFORT_POINTS = {"low": 1, "medium": 2, "high": 3}
+# Share of the claimed saving counted when choosing between alternatives
+RISK_FACTORS = {"low": 1.0, "medium": 0.8, "high": 0.6}
+
+# Larger groups of overlapping candidates only consider their best ones
+MAX_GROUP_SIZE = 10
+
+def _number(value):
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+def _candidate(rec):
+    savings = _number(rec.get('potential_savings', 0))
+    current = _number(rec.get('current_cost', 0))
+    return {
+        "service": str(rec.get('service', '')).strip().lower(),
+        "resources": set(rec.get('resource_ids') or ()),
+        "type": str(rec.get('recommendation_type', '')).strip().lower(),
+        "savings": savings,
+        # Share of its line the recommendation removes, used to stack compatible changes
+        "rate": min(savings / current, 1.0) if current > 0 else 0.0,
+        "weight": EFFORT_POINTS.get(str(rec.get('implementation_effort', '')).lower(), 2),
+        "factor": RISK_FACTORS.get(str(rec.get('risk_level', '')).lower(), 0.8),
+    }
+
+def _overlap(a, b):
+    # Recommendations without resource ids cover their whole service
+    return a["service"] == b["service"] and (not a["resources"] or not b["resources"]
+                                             or not a["resources"].isdisjoint(b["resources"]))
+
+def _conflict(a, b):
+    # Two answers to the same question, or one that replaces the service altogether
+    return _overlap(a, b) and (a["type"] == b["type"] or a["type"] in EXCLUSIVE_TYPES
+                               or b["type"] in EXCLUSIVE_TYPES)
+
+def overlap_groups(candidates):
+    """
+    Split candidates into groups that share a service or resource.
+
+    Candidates are indexed by resource id and by service, so the grouping is
+    linear in the number of candidates; groups never interact.
+
+    Returns:
+        list: Lists of candidate indexes
+    """
+    parent = list(range(len(candidates)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i, j):
+        parent[find(i)] = find(j)
+
+    by_resource = {}
+    by_service = {}
+    service_wide = {}
+    for i, candidate in enumerate(candidates):
+        service = candidate["service"]
+        if candidate["resources"]:
+            for resource in candidate["resources"]:
+                key = (service, resource)
+                if key in by_resource:
+                    union(i, by_resource[key])
+                by_resource[key] = i
+        else:
+            if service in service_wide:
+                union(i, service_wide[service])
+            service_wide[service] = i
+        if service in by_service:
+            by_service[service].append(i)
+        else:
+            by_service[service] = [i]
+
+    # A service-wide candidate overlaps everything else in its service
+    for service, i in service_wide.items():
+        for j in by_service[service]:
+            union(i, j)
+
+    groups = {}
+    for i in range(len(candidates)):
+        groups.setdefault(find(i), []).append(i)
+    return list(groups.values())
+
+def group_options(candidates, group):
+    """
+    Every conflict-free subset of a group as (effort, risk-adjusted value, savings, members).
+
+    Compatible changes to the same line stack: each one saves its rate of
+    what the earlier ones left. Only the best option per effort is kept.
+    """
+    group = sorted(group, key=lambda i: candidates[i]["savings"], reverse=True)[:MAX_GROUP_SIZE]
+    size = len(group)
+    conflicts = [0] * size
+    for a in range(size):
+        for b in range(a + 1, size):
+            if _conflict(candidates[group[a]], candidates[group[b]]):
+                conflicts[a] |= 1 << b
+                conflicts[b] |= 1 << a
+
+    best = {}
+
+    def visit(start, mask, weight, value, savings, members):
+        # Depth-first over conflict-free subsets, extending each one incrementally
+        if weight not in best or value > best[weight][0]:
+            best[weight] = (value, savings, tuple(group[k] for k in members))
+        for k in range(start, size):
+            if conflicts[k] & mask:
+                continue
+            candidate = candidates[group[k]]
+            saved = candidate["savings"]
+            for j in members:
+                if _overlap(candidate, candidates[group[j]]):
+                    saved *= 1 - candidates[group[j]]["rate"]
+            visit(k + 1, mask | 1 << k, weight + candidate["weight"], value + saved * candidate["factor"],
+                  savings + saved, members + (k,))
+
+    visit(0, 0, 0, 0.0, 0.0, ())
+    return [(weight, value, savings, members) for weight, (value, savings, members) in best.items()]
+
+def select_savings(recommendations, effort_budget=None):
+    """
+    Choose the recommendations whose savings can be realised together.
+
+    Recommendations for the same service or resource are alternatives when
+    they have the same type or one replaces the service; only one of them
+    counts. Within that constraint, the set with the highest risk-adjusted
+    savings is picked, using at most `effort_budget` effort points
+    (low=1, medium=2, high=3) when given: a multiple-choice knapsack with one
+    choice per overlap group.
+
+    Returns:
+        dict: selected (recommendation indexes), combined_savings,
+        risk_adjusted_savings, claimed_savings and effort_points
+    """
+    candidates = [_candidate(rec) for rec in recommendations]
+    options = [group_options(candidates, group) for group in overlap_groups(candidates)]
+
+    chosen = []
+    if effort_budget is None:
+        for group in options:
+            chosen.append(max(group, key=lambda option: (option[1], -option[0])))
+    else:
+        # dp[c] = best value within c effort points; choice[g][c] = option used by group g
+        capacity = max(0, int(effort_budget))
+        dp = np.zeros(capacity + 1)
+        choices = []
+        for group in options:
+            best = dp.copy()
+            choice = np.zeros(capacity + 1, dtype=np.int64)
+            for n, (weight, value, _, _) in enumerate(group):
+                if weight == 0 or weight > capacity:
+                    continue
+                shifted = np.full(capacity + 1, -np.inf)
+                shifted[weight:] = dp[:capacity + 1 - weight] + value
+                better = shifted > best
+                best[better] = shifted[better]
+                choice[better] = n + 1
+            choices.append(choice)
+            dp = best
+
+        c = capacity
+        for group, choice in zip(reversed(options), reversed(choices)):
+            n = choice[c]
+            if n:
+                chosen.append(group[n - 1])
+                c -= group[n - 1][0]
+
+    selected = sorted(i for option in chosen for i in option[3])
+    return {
+        "selected": selected,
+        "combined_savings": round(sum(option[2] for option in chosen), 2),
+        "risk_adjusted_savings": round(sum(option[1] for option in chosen), 2),
+        "claimed_savings": round(sum(c["savings"] for c in candidates), 2),
+        "effort_points": int(sum(option[0] for option in chosen))
+    }
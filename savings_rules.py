@@ -0,0 +1,219 @@
+import numpy as np
+from billing_table import BillingTable
+from pricing import HOURS_PER_MONTH, RESERVED_DISCOUNTS, canonical_names, get_price, smaller_hourly_type
+
+# Bump when a rule or its assumptions change so cached reports are regenerated
+RULES_VERSION = 2
+
+# 90% of a 720-hour month, so a 672-hour February still counts as always on
+STEADY_HOURS = HOURS_PER_MONTH * 0.9
+
+# Share of S3 Standard data assumed cold enough for Standard-IA after a 30-day lifecycle rule
+S3_COLD_SHARE = 0.5
+ARCHIVE_KEYWORDS = ("backup", "archive", "log", "snapshot")
+
+SAVINGS_RULES = {}
+
+def savings_rule(name):
+    """
+    Register a rule under `name`.
+
+    A rule takes the list of line items from `line_items` and returns
+    recommendation dicts, built with `make_recommendation`.
+    """
+    def decorator(rule):
+        SAVINGS_RULES[name] = rule
+        return rule
+    return decorator
+
+def line_items(table):
+    """
+    Usage of each (resource, usage type) pair of a BillingTable.
+
+    Quantities and costs are summed per month with one bincount, then
+    averaged over the months the item was billed. Service, usage type and
+    unit are given in the price list's terms (see pricing.canonical_names),
+    so the rules also apply to AWS Cost and Usage Report exports.
+
+    Returns:
+        list: Dicts with resource_id, service, region, usage_type, unit,
+        months_billed, every_month, monthly_quantity, min_quantity and monthly_cost
+    """
+    if not len(table):
+        return []
+    n_months = len(table.labels['month'])
+    n_types = len(table.labels['usage_type'])
+    pairs = table.codes['resource_id'].astype(np.int64) * n_types + table.codes['usage_type']
+    keys, first, item_codes = np.unique(pairs, return_index=True, return_inverse=True)
+
+    cells = item_codes.astype(np.int64) * n_months + table.codes['month']
+    size = len(keys) * n_months
+    cost = np.bincount(cells, weights=table.cost_inr, minlength=size).reshape(len(keys), n_months)
+    quantity = np.bincount(cells, weights=table.usage_quantity, minlength=size).reshape(len(keys), n_months)
+    billed = np.bincount(cells, minlength=size).reshape(len(keys), n_months) > 0
+
+    months_billed = billed.sum(axis=1)
+    monthly_cost = cost.sum(axis=1) / months_billed
+    monthly_quantity = quantity.sum(axis=1) / months_billed
+    min_quantity = np.where(billed, quantity, np.inf).min(axis=1)
+
+    labels = table.labels
+    items = []
+    for i, row in enumerate(first):
+        service, usage_type, unit = canonical_names(labels['service'][table.codes['service'][row]],
+                                                    labels['usage_type'][table.codes['usage_type'][row]],
+                                                    labels['unit'][table.codes['unit'][row]])
+        items.append({
+            "resource_id": labels['resource_id'][table.codes['resource_id'][row]],
+            "service": service,
+            "region": labels['region'][table.codes['region'][row]],
+            "usage_type": usage_type,
+            "unit": unit,
+            "months_billed": int(months_billed[i]),
+            "every_month": bool(months_billed[i] == n_months),
+            "monthly_quantity": float(monthly_quantity[i]),
+            "min_quantity": float(min_quantity[i]),
+            "monthly_cost": float(monthly_cost[i])
+        })
+    return items
+
+def make_recommendation(rule, items, savings, title, recommendation_type, description,
+                        steps, implementation_effort="low", risk_level="low"):
+    # Same fields as models.Recommendation, plus the rule and the resources it covers
+    return {
+        "title": title,
+        "service": items[0]["service"],
+        "current_cost": round(sum(item["monthly_cost"] for item in items), 2),
+        "potential_savings": round(savings, 2),
+        "recommendation_type": recommendation_type,
+        "description": description,
+        "implementation_effort": implementation_effort,
+        "risk_level": risk_level,
+        "steps": steps,
+        "cloud_providers": ["AWS"],
+        "rule": rule,
+        "resource_ids": sorted({item["resource_id"] for item in items})
+    }
+
+def _resource_list(items, limit=3):
+    ids = sorted({item["resource_id"] for item in items})
+    if len(ids) <= limit:
+        return ", ".join(ids)
+    return f"{', '.join(ids[:limit])} and {len(ids) - limit} more"
+
+def _group(items, key):
+    groups = {}
+    for item in items:
+        groups.setdefault(key(item), []).append(item)
+    return groups
+
+@savings_rule("reserved_instances")
+def reserved_instances(items):
+    # Instances that ran (nearly) every hour of every billed month
+    steady = [item for item in items
+              if item["service"] in RESERVED_DISCOUNTS and item["unit"] == "hours"
+              and item["every_month"] and item["min_quantity"] >= STEADY_HOURS]
+
+    recommendations = []
+    for (service, usage_type), group in _group(steady, lambda i: (i["service"], i["usage_type"])).items():
+        discount = RESERVED_DISCOUNTS[service]
+        cost = sum(item["monthly_cost"] for item in group)
+        recommendations.append(make_recommendation(
+            "reserved_instances", group, cost * discount,
+            f"Reserve {len(group)} always-on {service} {usage_type} instance{'s' if len(group) > 1 else ''}",
+            "reserved_instances",
+            f"{_resource_list(group)} {'run' if len(group) > 1 else 'runs'} around the clock. A 1-year, "
+            f"no-upfront reservation costs about {discount:.0%} less than on-demand for the same hours.",
+            [f"Confirm {usage_type} is still the right size for these instances",
+             f"Buy {len(group)} 1-year no-upfront {service} reservation{'s' if len(group) > 1 else ''} "
+             f"for {usage_type} in {group[0]['region']}",
+             "Check the reservation utilisation report after the first month"]
+        ))
+    return recommendations
+
+@savings_rule("s3_storage_tiering")
+def s3_storage_tiering(items):
+    standard = get_price("S3", "Standard")[2]
+    tiers = {
+        # Backups and logs are rarely read, so all of it can go to the archive tier
+        "archive": ("Glacier Instant Retrieval", get_price("S3", "Glacier-Instant-Retrieval")[2], 1.0),
+        "infrequent": ("Standard-IA", get_price("S3", "Standard-IA")[2], S3_COLD_SHARE),
+    }
+
+    def tier(item):
+        name = item["resource_id"].lower()
+        return "archive" if any(keyword in name for keyword in ARCHIVE_KEYWORDS) else "infrequent"
+
+    buckets = [item for item in items
+               if item["service"] == "S3" and item["usage_type"] == "Standard" and item["monthly_cost"] > 0]
+    recommendations = []
+    for key, group in _group(buckets, tier).items():
+        target, price, share = tiers[key]
+        cost = sum(item["monthly_cost"] for item in group)
+        gigabytes = sum(item["monthly_quantity"] for item in group)
+        recommendations.append(make_recommendation(
+            "s3_storage_tiering", group, cost * share * (1 - price / standard),
+            f"Move {_resource_list(group, 1)} to S3 {target}",
+            "cost_effective_storage",
+            f"{_resource_list(group)} {'store' if len(group) > 1 else 'stores'} about {gigabytes:,.0f} GB in S3 Standard. A lifecycle rule "
+            f"moving {share:.0%} of it to {target} cuts its storage price by {1 - price / standard:.0%}; "
+            f"reads from the cheaper tier carry a retrieval fee.",
+            ["Check the access pattern of the buckets with S3 Storage Lens",
+             f"Add a lifecycle rule that transitions objects older than 30 days to {target}",
+             "Watch retrieval charges for the first month"]
+        ))
+    return recommendations
+
+@savings_rule("rds_right_sizing")
+def rds_right_sizing(items):
+    """
+    One size down for RDS instances above the smallest size.
+
+    Billing records carry no CPU or connection metrics, so these are
+    candidates to confirm in CloudWatch before resizing.
+    """
+    candidates = {}
+    for item in items:
+        if item["service"] != "RDS" or item["unit"] != "hours":
+            continue
+        smaller = smaller_hourly_type("RDS", item["usage_type"])
+        if smaller is not None:
+            candidates.setdefault((item["usage_type"], smaller), []).append(item)
+
+    recommendations = []
+    for (usage_type, (price, smaller_type)), group in candidates.items():
+        current_price = get_price("RDS", usage_type)[2]
+        cost = sum(item["monthly_cost"] for item in group)
+        recommendations.append(make_recommendation(
+            "rds_right_sizing", group, cost * (1 - price / current_price),
+            f"Right-size RDS {usage_type} to {smaller_type}",
+            "right_sizing",
+            f"{_resource_list(group)} {'run' if len(group) > 1 else 'runs'} on {usage_type}. If CPU and "
+            f"connections stay low, {smaller_type} costs {1 - price / current_price:.0%} less per hour.",
+            ["Review CPUUtilization, FreeableMemory and DatabaseConnections in CloudWatch for 2 weeks",
+             f"Modify the instance class to {smaller_type} in the next maintenance window",
+             "Compare query latency before and after the change"],
+            implementation_effort="medium", risk_level="medium"
+        ))
+    return recommendations
+
+def run_rules(billing, rules=None):
+    """
+    Derive recommendations from billing records without calling the LLM.
+
+    Args:
+        billing: Record list, BillingRecordStore or BillingTable
+        rules: Names of registered rules to run (default: all)
+
+    Returns:
+        list: Recommendation dicts ranked by potential_savings
+    """
+    table = billing if isinstance(billing, BillingTable) else BillingTable.from_records(billing)
+    items = line_items(table)
+
+    recommendations = []
+    for name in rules or SAVINGS_RULES:
+        recommendations.extend(SAVINGS_RULES[name](items))
+    recommendations = [rec for rec in recommendations if rec["potential_savings"] > 0]
+    recommendations.sort(key=lambda rec: rec["potential_savings"], reverse=True)
+    return recommendations
@@ -0,0 +1,69 @@
+import json
+import hashlib
+from utils import get_output_path
+
+FINGERPRINT_SUFFIX = ".fingerprint"
+
+def hash_data(data):
+    # Canonical JSON, so re-formatting an artifact does not invalidate downstream stages
+    if isinstance(data, str):
+        payload = data
+    else:
+        payload = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(',', ':'),
+                             default=_to_jsonable)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def _to_jsonable(value):
+    # Typed records (pydantic models) hash by their field values; record stores
+    # and mapped columnar files by a digest of their columns
+    if hasattr(value, "content_digest"):
+        return {"content_digest": value.content_digest()}
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    if hasattr(value, "to_dicts"):
+        return value.to_dicts()
+    raise TypeError(f"Cannot fingerprint {type(value).__name__}")
+
+def compute_fingerprint(stage, prompt_version, llm, *inputs):
+    """
+    Fingerprint of everything a stage's output depends on.
+
+    Args:
+        stage: Stage name
+        prompt_version: Version of the stage's prompt template
+        llm: LLMHandler whose model name and sampling parameters are used
+        *inputs: Upstream data (description text, profile, billing records)
+
+    Returns:
+        str: Hex digest
+    """
+    h = hashlib.sha256()
+    h.update(json.dumps({
+        "stage": stage,
+        "prompt_version": prompt_version,
+        "model": llm.model_name,
+        "params": llm.model_params
+    }, sort_keys=True).encode('utf-8'))
+    for data in inputs:
+        h.update(hash_data(data).encode('ascii'))
+    return h.hexdigest()
+
+def is_up_to_date(artifact, fingerprint):
+    # The artifact must exist and have been produced from the same inputs
+    try:
+        with open(get_output_path(artifact + FINGERPRINT_SUFFIX), 'r', encoding='utf-8') as f:
+            recorded = json.load(f).get("fingerprint")
+        with open(get_output_path(artifact), 'rb'):
+            pass
+    except (OSError, ValueError, AttributeError):
+        return False
+    return recorded == fingerprint
+
+def record_fingerprint(artifact, fingerprint):
+    try:
+        with open(get_output_path(artifact + FINGERPRINT_SUFFIX), 'w', encoding='utf-8') as f:
+            json.dump({"fingerprint": fingerprint}, f)
+        return True
+    except OSError as e:
+        print(f"Could not record fingerprint for {artifact}: {str(e)}")
+        return False
@@ -0,0 +1,253 @@
+import os
+import json
+import time
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+from utils import get_output_path
+
+TRACE_FILE = "traces.jsonl"
+
+# Ollama's final-chunk statistics; durations are in nanoseconds
+OLLAMA_METRICS = ("total_duration", "load_duration", "prompt_eval_count", "prompt_eval_duration",
+                  "eval_count", "eval_duration")
+
+# Numeric span attributes that the summary table adds up per span name
+SUMMARY_COLUMNS = (
+    ("prompt_tokens_estimate", "Prompt est"),
+    ("prompt_tokens", "Prompt tok"),
+    ("response_tokens", "Output tok"),
+    ("load_duration_ms", "Load ms"),
+    ("eval_duration_ms", "Eval ms"),
+    # Client-side: all a stream stopped before Ollama's final chunk reports
+    ("first_chunk_duration_ms", "First ms"),
+    ("stream_duration_ms", "Stream ms"),
+    ("retries", "Retries"),
+    ("parse_ms", "Parse ms"),
+)
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+def _new_id(nbytes):
+    return os.urandom(nbytes).hex()
+
+class Span:
+    """One timed operation: an LLM call, a JSON parse or a pipeline stage."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns",
+                 "attributes", "status", "_started")
+
+    def __init__(self, name, trace_id, parent_id=None, attributes=None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.status = "ok"
+        # Wall-clock start for exporters, monotonic clock for the duration
+        self.start_ns = time.time_ns()
+        self._started = time.perf_counter_ns()
+        self.end_ns = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def add(self, key, amount=1):
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def finish(self):
+        self.end_ns = self.start_ns + (time.perf_counter_ns() - self._started)
+
+    @property
+    def duration_ms(self):
+        end = self.end_ns if self.end_ns is not None else self.start_ns + (time.perf_counter_ns() - self._started)
+        return (end - self.start_ns) / 1e6
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "attributes": self.attributes
+        }
+
+class Tracer:
+    """
+    Collects spans for the current run.
+
+    The active span is tracked in a context variable, so spans opened in
+    worker threads started with asyncio.to_thread nest under the stage that
+    started them.
+    """
+
+    def __init__(self, otlp_file=None):
+        self.trace_id = _new_id(16)
+        self.spans = []
+        # Optional second export in OpenTelemetry's OTLP/JSON format
+        self.otlp_file = otlp_file
+        self._lock = threading.Lock()
+
+    def start_trace(self):
+        with self._lock:
+            self.trace_id = _new_id(16)
+            self.spans = []
+        return self.trace_id
+
+    @contextmanager
+    def span(self, name, **attributes):
+        parent = _current_span.get()
+        span = Span(name, self.trace_id, parent.span_id if parent else None, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.attributes.setdefault("error", f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            span.finish()
+            _current_span.reset(token)
+            with self._lock:
+                self.spans.append(span)
+
+    def finish_trace(self):
+        # Summary table plus the JSONL (and optional OTLP) export of this run
+        self.print_summary()
+        self.export_jsonl()
+        if self.otlp_file:
+            self.export_otlp(self.otlp_file)
+
+    def export_jsonl(self, filename=TRACE_FILE):
+        # Appends, so the file keeps a history of runs keyed by trace_id
+        filepath = get_output_path(filename)
+        try:
+            with open(filepath, 'a', encoding='utf-8') as f:
+                for span in self.spans:
+                    f.write(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n")
+            print(f"Saved trace: {filepath}")
+            return True
+        except OSError as e:
+            print(f"Error saving trace {filepath}: {str(e)}")
+            return False
+
+    def export_otlp(self, filename):
+        """
+        Write the spans as OTLP/JSON (one ExportTraceServiceRequest per line),
+        the format read by the OpenTelemetry Collector's otlpjsonfile receiver.
+        """
+        filepath = get_output_path(filename)
+        request = {"resourceSpans": [{
+            "resource": {"attributes": [_otlp_attribute("service.name", "cloud-cost-optimizer")]},
+            "scopeSpans": [{
+                "scope": {"name": "tracing"},
+                "spans": [_otlp_span(span) for span in self.spans]
+            }]
+        }]}
+        try:
+            with open(filepath, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(request, ensure_ascii=False) + "\n")
+            print(f"Saved OTLP trace: {filepath}")
+            return True
+        except OSError as e:
+            print(f"Error saving trace {filepath}: {str(e)}")
+            return False
+
+    def summarize(self):
+        """
+        Totals per span name, in first-seen order.
+
+        Returns:
+            list: Dicts with name, count, total_ms and the SUMMARY_COLUMNS sums
+        """
+        rows = {}
+        for span in sorted(self.spans, key=lambda s: s.start_ns):
+            row = rows.setdefault(span.name, {"name": span.name, "count": 0, "total_ms": 0.0, "errors": 0})
+            row["count"] += 1
+            row["total_ms"] += span.duration_ms
+            row["errors"] += span.status == "error"
+            for key, _ in SUMMARY_COLUMNS:
+                value = span.attributes.get(key)
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    row[key] = row.get(key, 0) + value
+        return list(rows.values())
+
+    def print_summary(self):
+        rows = self.summarize()
+        if not rows:
+            return
+        header = f"  {'Span':24s} {'Count':>5s} {'Total ms':>10s}"
+        header += "".join(f" {title:>10s}" for _, title in SUMMARY_COLUMNS)
+        print(f"\n{'='*len(header)}")
+        print(f"  TIMING SUMMARY (trace {self.trace_id[:8]})")
+        print(f"{'='*len(header)}")
+        print(header)
+        for row in rows:
+            line = f"  {row['name']:24s} {row['count']:>5d} {row['total_ms']:>10.1f}"
+            for key, _ in SUMMARY_COLUMNS:
+                value = row.get(key)
+                line += f" {value:>10.1f}" if isinstance(value, float) else f" {value if value is not None else '-':>10}"
+            print(line)
+        print(f"{'='*len(header)}\n")
+
+def _otlp_attribute(key, value):
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+def _otlp_span(span):
+    data = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 1,
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": [_otlp_attribute(k, v) for k, v in span.attributes.items() if v is not None],
+        "status": {"code": 2 if span.status == "error" else 1}
+    }
+    if span.parent_id:
+        data["parentSpanId"] = span.parent_id
+    return data
+
+def ollama_attributes(metadata):
+    # Ollama statistics as span attributes, with durations in milliseconds
+    attributes = {}
+    if "prompt_eval_count" in metadata:
+        attributes["prompt_tokens"] = metadata["prompt_eval_count"]
+    if "eval_count" in metadata:
+        attributes["response_tokens"] = metadata["eval_count"]
+    for key in ("total_duration", "load_duration", "prompt_eval_duration", "eval_duration",
+                "first_chunk_duration", "stream_duration"):
+        if key in metadata:
+            attributes[f"{key}_ms"] = round(metadata[key] / 1e6, 3)
+    return attributes
+
+_tracer = Tracer()
+
+def get_tracer():
+    return _tracer
+
+def span(name, **attributes):
+    return _tracer.span(name, **attributes)
+
+def current_span():
+    return _current_span.get()
+
+def traced(name):
+    # Decorator form of span() for whole pipeline stages
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _tracer.span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
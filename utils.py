@@ -1,21 +1,181 @@
 import os
+import io
 import json
+import mmap
 from pathlib import Path
+from contextlib import contextmanager, ExitStack
 
 OUTPUT_DIR = "outputs"
 
+# Compression and serialization are chosen by the file extension,
+# e.g. report.json, mock_billing.json.gz, history.msgpack.zst
+COMPRESSION_SUFFIXES = (".gz", ".zst")
+# zlib's default of 9 is several times slower for a few percent smaller files
+GZIP_LEVEL = 6
+MSGPACK_SUFFIXES = (".msgpack", ".mpk")
+
 def ensure_output_dir():
     Path(OUTPUT_DIR).mkdir(exist_ok=True)
 
 def get_output_path(filename):
-    ensure_output_dir()
-    return os.path.join(OUTPUT_DIR,filename)
+    # filename may include a sub-directory, e.g. "batch/my-project/mock_billing.json"
+    filepath = os.path.join(OUTPUT_DIR,filename)
+    Path(filepath).parent.mkdir(parents=True, exist_ok=True)
+    return filepath
+
+def split_compression(path):
+    # Returns (path without the compression suffix, ".gz"/".zst" or None)
+    for suffix in COMPRESSION_SUFFIXES:
+        if path.endswith(suffix):
+            return path[:-len(suffix)], suffix
+    return path, None
+
+def _zstd():
+    # Python 3.14+ ships zstd; before that it needs the optional zstandard package
+    try:
+        from compression import zstd
+        return zstd
+    except ImportError:
+        pass
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        raise ValueError("zstd compression needs Python 3.14+ or the zstandard package") from None
+
+def open_compressed(path, mode='rb'):
+    """
+    Open `path` for reading or writing, compressing by extension.
+
+    Accepts the binary modes 'rb'/'wb' and the text modes 'rt'/'wt' (UTF-8).
+    """
+    compression = split_compression(path)[1]
+    binary_mode = mode.replace('t', '') + ('' if 'b' in mode else 'b')
+    if compression == ".gz":
+        import gzip
+        f = gzip.open(path, binary_mode, compresslevel=GZIP_LEVEL)
+    elif compression == ".zst":
+        f = _zstd().open(path, binary_mode)
+    else:
+        f = open(path, binary_mode)
+    if 'b' in mode:
+        return f
+    return io.TextIOWrapper(f, encoding='utf-8', newline='')
+
+@contextmanager
+def atomic_file(filepath):
+    """
+    Binary file that replaces `filepath` when the block exits cleanly.
+
+    Data goes to a temporary file in the same directory, which is flushed to
+    disk and then renamed over the target, so readers see either the old or
+    the new file, never a partial one. On an exception the target is untouched.
+    """
+    import tempfile
+    directory = os.path.dirname(filepath) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(filepath)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file owner-only; keep the target's permissions instead
+        try:
+            os.chmod(tmp_path, os.stat(filepath).st_mode & 0o777)
+        except FileNotFoundError:
+            os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+@contextmanager
+def compressing(raw, filepath):
+    # Binary writer over the open file `raw`, compressed by the extension of `filepath`
+    compression = split_compression(filepath)[1]
+    if compression is None:
+        yield raw
+    elif compression == ".gz":
+        import gzip
+        with gzip.GzipFile(filename=os.path.basename(filepath)[:-3], mode='wb', fileobj=raw,
+                           compresslevel=GZIP_LEVEL) as f:
+            yield f
+    else:
+        with _zstd().open(raw, 'wb') as f:
+            yield f
+
+def atomic_write(filepath, data):
+    # Bytes to `filepath` through atomic_file, compressed by extension
+    with atomic_file(filepath) as raw, compressing(raw, filepath) as f:
+        f.write(data)
+
+def _is_msgpack(filepath):
+    return split_compression(filepath)[0].endswith(MSGPACK_SUFFIXES)
+
+def serialize(data, filepath):
+    """
+    Encode data for `filepath`: msgpack for .msgpack/.mpk, JSON otherwise.
+
+    JSON is indented for plain files and compact inside compressed ones.
+    orjson is used when installed, falling back to the json module for
+    values it does not handle.
+    """
+    if _is_msgpack(filepath):
+        try:
+            import msgpack
+        except ImportError:
+            raise ValueError("msgpack artifacts need the msgpack package") from None
+        return msgpack.packb(data, use_bin_type=True)
+
+    indent = split_compression(filepath)[1] is None
+    try:
+        import orjson
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+    except (ImportError, TypeError):
+        return json.dumps(data, indent=2 if indent else None, ensure_ascii=False).encode('utf-8')
+
+def deserialize(raw, filepath):
+    # raw may be bytes or a memoryview, e.g. of a mapped file
+    if _is_msgpack(filepath):
+        try:
+            import msgpack
+        except ImportError:
+            raise ValueError("msgpack artifacts need the msgpack package") from None
+        return msgpack.unpackb(raw, raw=False)
+    try:
+        import orjson
+    except ImportError:
+        return json.loads(bytes(raw))
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch either
+    return orjson.loads(raw)
+
+def map_file(filepath):
+    """
+    Memory-map an uncompressed file read-only.
+
+    Returns:
+        mmap or None: None for compressed or empty files, which cannot be mapped
+    """
+    if split_compression(filepath)[1] is not None:
+        return None
+    with open(filepath, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def read_artifact(filepath):
+    # Mapped when possible, so large files are paged in by the OS instead of copied
+    mapped = map_file(filepath)
+    if mapped is not None:
+        return mapped
+    with open_compressed(filepath, 'rb') as f:
+        return f.read()
 
 def save_text(filename, content):
     filepath = get_output_path(filename)
     try:
-        with open(filepath,'w',encoding='utf-8') as f:
-            f.write(content)
+        atomic_write(filepath, content.encode('utf-8'))
         print(f"Saved : {filepath}")
         return True
     except Exception as e:
@@ -25,7 +185,7 @@ def save_text(filename, content):
 def load_text(filename):
     filepath = get_output_path(filename)
     try:
-        with open(filepath,'r',encoding='utf-8') as f:
+        with open_compressed(filepath, 'rt') as f:
             return f.read()
     except FileNotFoundError:
         print(f"File not found")
@@ -36,19 +196,89 @@ def load_text(filename):
 def save_json(filename,data):
     filepath = get_output_path(filename)
     try:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data,f,indent=2,ensure_ascii=False)
+        atomic_write(filepath, serialize(data, filepath))
         print(f"Saved: {filepath}")
         return True
     except Exception as e:
-        print(f"Error reading {filepath}: {str(e)}")
+        print(f"Error saving {filepath}: {str(e)}")
         return False
 
+class JsonArrayWriter:
+    """
+    Write a JSON array to disk one item at a time.
+
+    Items go through atomic_file, so the target is replaced only when the
+    block exits cleanly and a failed run never leaves a half-written file.
+    A .gz/.zst target is compressed as it is written; msgpack targets are
+    rejected, as the array is streamed as JSON text.
+    """
+
+    def __init__(self, filename):
+        self.filepath = get_output_path(filename)
+        if _is_msgpack(self.filepath):
+            raise ValueError(f"Cannot stream a JSON array to a msgpack file: {self.filepath}")
+        self.count = 0
+        self.aborted = False
+        self._file = None
+        self._stack = None
+
+    def __enter__(self):
+        with ExitStack() as stack:
+            raw = stack.enter_context(atomic_file(self.filepath))
+            stream = stack.enter_context(compressing(raw, self.filepath))
+            self._file = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+            self._file.write('[')
+            self._stack = stack.pop_all()
+        return self
+
+    def write(self, item):
+        self._file.write(',\n' if self.count else '\n')
+        json.dump(item, self._file, ensure_ascii=False)
+        self.count += 1
+
+    def abort(self):
+        self.aborted = True
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None and not self.aborted:
+            self._file.write('\n]\n')
+        # Release the text layer without closing the file atomic_file still has to sync
+        self._file.flush()
+        self._file.detach()
+        if exc_type is None and self.aborted:
+            # atomic_file only discards its temporary file when an exception reaches it
+            exc_type, exc, tb = _Discarded, _Discarded(), None
+        self._stack.__exit__(exc_type, exc, tb)
+        if exc_type is None:
+            print(f"Saved: {self.filepath}")
+        return False
+
+class _Discarded(Exception):
+    pass
+
+def load_bytes(filename):
+    filepath = get_output_path(filename)
+    try:
+        with open_compressed(filepath, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        print(f"File not found: {filepath}")
+        return None
+    except Exception as e:
+        print(f"Error reading {filepath}: {str(e)}")
+        return None
+
 def load_json(filename):
     filepath = get_output_path(filename)
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        raw = read_artifact(filepath)
+        if not isinstance(raw, mmap.mmap):
+            return deserialize(raw, filepath)
+        try:
+            with memoryview(raw) as view:
+                return deserialize(view, filepath)
+        finally:
+            raw.close()
     except FileNotFoundError:
         print(f"File not found: {filepath}")
         return None
@@ -89,22 +319,16 @@ def validate_billing_data(billing):
     if len(billing) < 12:
         print(f" Billing data should have at least 12 records, got {len(billing)}")
         return False
-    
-    required_fields = ["month", "service", "cost_inr"]
 
-    for i, record in enumerate(billing):
-        if not isinstance(record, dict):
-            print(f"Record {i} is not a JSON object")
-            return False
-        
-        for field in required_fields:
-            if field not in record:
-                print(f"Record {i} missing field: {field}")
-                return False
+    # pydantic is only needed once billing data is actually validated
+    from models import validate_billing_records
+    records, errors = validate_billing_records(billing)
+    for error in errors:
+        print(error)
     
-    return True
+    return records is not None
 
-def validate_cost_report(report):
+def validate_cost_report(report, min_recommendations=6):
     if not isinstance(report,dict):
         print(f"Report must be JSON object")
         return False
@@ -121,8 +345,8 @@ def validate_cost_report(report):
         print(f"Recommendation must be array/list")
         return False
     
-    if len(report["recommendations"]) < 6:
-        print(f"Length of the recommendations must be at least 6")
+    if len(report["recommendations"]) < min_recommendations:
+        print(f"Length of the recommendations must be at least {min_recommendations}")
         return False
 
     return True